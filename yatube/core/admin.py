@@ -0,0 +1,82 @@
+'''Админка для больших таблиц.
+
+CursorModelAdmin листает список курсором по pk, как страницы подписок:
+без COUNT и OFFSET, поэтому глубокие страницы стоят столько же, сколько
+первая. Сортировка по колонкам отключена - порядок всегда по убыванию pk.
+'''
+from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.utils.html import format_html
+
+from .pagination import cursor_paginate, parse_cursor
+
+CURSOR_VAR = 'cursor'
+
+
+class CursorChangeList(ChangeList):
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # смена фильтра или поиска начинает список сначала
+        new_params = new_params or {}
+        remove = list(remove or [])
+        if CURSOR_VAR not in new_params:
+            remove.append(CURSOR_VAR)
+        return super().get_query_string(new_params, remove)
+
+    def get_results(self, request):
+        cursor = parse_cursor(request.GET.get(CURSOR_VAR))
+        page = cursor_paginate(self.queryset, cursor, self.list_per_page)
+        self.result_list = page.object_list
+        self.result_count = len(page)
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.can_show_all = False
+        self.multi_page = False
+        self.paginator = None
+        self.first_url = (self.get_query_string()
+                          if cursor is not None else None)
+        self.next_url = (self.get_query_string({CURSOR_VAR: page.next_cursor})
+                         if page.has_next() else None)
+
+
+class CursorModelAdmin(admin.ModelAdmin):
+    change_list_template = 'admin/cursor_change_list.html'
+    show_full_result_count = False
+    sortable_by = ()
+
+    def get_changelist(self, request, **kwargs):
+        return CursorChangeList
+
+
+class SelectedRelatedFilter(admin.RelatedFieldListFilter):
+    '''Фильтр по связи, который не загружает все связанные объекты.
+
+    Показывается, только когда значение выбрано - ссылкой из колонки
+    filter_link; в списке есть лишь этот объект и «Все».
+    '''
+
+    def field_choices(self, field, request, model_admin):
+        pk = parse_cursor(self.lookup_val)
+        if pk is None:
+            return []
+        return field.get_choices(
+            include_blank=False, limit_choices_to={'pk': pk})
+
+    def has_output(self):
+        return bool(self.lookup_choices)
+
+
+def filter_link(field, description):
+    '''Колонка со ссылкой, фильтрующей список по значению связи field.'''
+    def column(obj):
+        return format_html(
+            '<a href="?{}__id__exact={}">{}</a>',
+            field, getattr(obj, f'{field}_id'), getattr(obj, field),
+        )
+    column.short_description = description
+    return column
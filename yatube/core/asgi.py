@@ -0,0 +1,212 @@
+'''ASGI-адаптер для синхронного Django.
+
+Django 2.2 не умеет асинхронные представления, поэтому представления
+по-прежнему выполняются в пуле потоков. Зато прием тела запроса и отдача
+ответа медленным клиентам идут в цикле событий и не держат поток: поток
+занят только на время работы представления с базой.
+
+Тело ответа перебирается в том же потоке, что выполнял представление:
+потоковый ответ (экспорт) читает курсор соединения своего потока, а
+соединение другого потока может быть закрыто по окончании чужого
+запроса. Поток передает части в цикл событий и ждет, лишь когда у
+клиента скопилось STREAM_BUFFER непрочитанных частей.
+
+Пока идет ответ, цикл событий ждет http.disconnect: многие серверы молча
+отбрасывают отправку в закрытое соединение, поэтому об уходе клиента
+поток узнает от _Stream.close(), а не от ошибки send. Если клиент ушел,
+не дослав тело запроса, представление не вызывается.
+'''
+import asyncio
+import io
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+# сообщений ответа, которые поток отдает вперед, не дожидаясь клиента
+STREAM_BUFFER = 8
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+class _Stream:
+    '''Сообщения ответа из потока представления в цикл событий.'''
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue()
+        self.slots = threading.Semaphore(STREAM_BUFFER)
+        self.closed = False
+
+    def put(self, message):
+        '''Вызывается в потоке; ждет, пока клиент отстает на буфер.'''
+        self.slots.acquire()
+        if self.closed:
+            raise ClientDisconnected
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, message)
+
+    def finish(self):
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, None)
+
+    async def get(self):
+        message = await self.queue.get()
+        self.slots.release()
+        return message
+
+    def close(self):
+        '''Клиент ушел: поток прервет перебор тела при следующей части.'''
+        self.closed = True
+        self.slots.release()
+
+
+class AsgiHandler:
+    def __init__(self, wsgi_app, executor=None):
+        self.wsgi_app = wsgi_app
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=settings.ASGI_THREADS)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f'Неподдерживаемый тип {scope["type"]}')
+        body = await self.read_body(receive)
+        if body is not None:
+            await self.respond(self.environ(scope, body), receive, send)
+
+    async def respond(self, environ, receive, send):
+        '''Выполняет представление в пуле и передает ответ клиенту.'''
+        loop = asyncio.get_running_loop()
+        stream = _Stream(loop)
+        task = loop.run_in_executor(self.executor, self.run, environ, stream)
+        watcher = asyncio.ensure_future(self.watch(receive, stream))
+        try:
+            while True:
+                message = await stream.get()
+                if message is None:
+                    break
+                await send(message)
+        except BaseException:
+            stream.close()
+            try:
+                await task
+            except ClientDisconnected:
+                pass
+            raise
+        finally:
+            watcher.cancel()
+        try:
+            # ошибка потока до начала ответа всплывает здесь
+            await task
+        except ClientDisconnected:
+            return
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    async def watch(receive, stream):
+        '''Закрывает поток ответа, когда клиент отключится.'''
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                stream.close()
+                return
+
+    @staticmethod
+    async def read_body(receive):
+        '''Тело запроса или None, если клиент ушел, не дослав его.'''
+        body = io.BytesIO()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            body.write(message.get('body', b''))
+            if not message.get('more_body', False):
+                break
+        body.seek(0)
+        return body
+
+    @staticmethod
+    def environ(scope, body):
+        server_name, server_port = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        # WSGI передает путь байтами, декодированными как latin-1
+        path = scope['path'].encode('utf-8').decode('latin-1')
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', ''),
+            'PATH_INFO': path,
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server_name,
+            'SERVER_PORT': str(server_port),
+            'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+            'REMOTE_ADDR': client[0],
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                environ[name] = value
+                continue
+            key = f'HTTP_{name}'
+            if key in environ:
+                value = f'{environ[key]},{value}'
+            environ[key] = value
+        return environ
+
+    def run(self, environ, stream):
+        '''Выполняет представление и перебирает тело ответа в потоке.'''
+        try:
+            status, headers, chunks = self.start(environ)
+            try:
+                stream.put({
+                    'type': 'http.response.start',
+                    'status': status,
+                    'headers': headers,
+                })
+                for chunk in chunks:
+                    if chunk:
+                        stream.put({
+                            'type': 'http.response.body',
+                            'body': chunk,
+                            'more_body': True,
+                        })
+            finally:
+                close = getattr(chunks, 'close', None)
+                if close is not None:
+                    close()
+        finally:
+            stream.finish()
+
+    def start(self, environ):
+        '''Выполняет представление; возвращает статус, заголовки и тело.'''
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers
+            ]
+
+        chunks = self.wsgi_app(environ, start_response)
+        return response['status'], response['headers'], chunks
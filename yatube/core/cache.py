@@ -0,0 +1,151 @@
+'''Кэши приложений и защита от одновременного пересчета.
+
+У каждого приложения свой алиас в CACHES (см. cache_alias в settings):
+собственные префикс, версия и каталог, поэтому ключи приложений не
+пересекаются, а clear() и смена версии в CACHE_VERSIONS сбрасывают
+только одно пространство имен. В профиле shared все процессы машины
+работают с одним кэшем, и удаление ключа в одном процессе видно
+остальным.
+
+get_or_refresh() хранит значение вместе со сроком годности и временем
+пересчета. Устаревшее значение еще STALE_TTL секунд отдается всем, пока
+его пересчитывает один запрос, взявший блокировку (cache.add). Пересчет
+начинается заранее с вероятностью, растущей к концу срока (XFetch), так
+что горячий ключ обычно обновляется до истечения. При полном промахе
+остальные запросы ждут результат не дольше LOCK_WAIT.
+
+Время пересчетов копится в пространстве имен core по имени metric
+(по умолчанию первая часть ключа) и выводится командой ``cache_metrics``.
+Каждый счетчик - отдельный ключ, который меняется атомарным incr, так
+что выдача устаревшего значения стоит одной записи в кэш.
+'''
+import math
+import random
+import time
+
+from django.core.cache import caches
+
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 5
+POLL_INTERVAL = 0.05
+STALE_TTL = 60 * 5
+BETA = 1.0
+METRICS_KEY = 'metrics'
+COUNTERS = ('count', 'total', 'max', 'stale')
+
+
+def namespace(name):
+    '''Кэш пространства имен posts, users или core.'''
+    return caches[name]
+
+
+def _lock_key(key):
+    return f'{key}:lock'
+
+
+def _wait(cache, key):
+    '''Ждет значение, которое считает другой запрос.'''
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def _expired(expires, delta, beta):
+    '''Истек ли срок с учетом вероятностного раннего пересчета.'''
+    jitter = -delta * beta * math.log(1 - random.random())
+    return time.time() + jitter >= expires
+
+
+def _counter_key(name, counter):
+    return f'{METRICS_KEY}:{name}:{counter}'
+
+
+def _incr(cache, key, delta=1):
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key, delta)
+
+
+def _register(cache, name):
+    '''Вносит имя в список метрик, если его там еще нет.'''
+    # список меняется только при появлении новой метрики; запись,
+    # потерянную из-за гонки процессов, повторяем до проверки
+    names = cache.get(METRICS_KEY) or set()
+    for _ in range(3):
+        if name in names:
+            return
+        cache.set(METRICS_KEY, names | {name}, None)
+        names = cache.get(METRICS_KEY) or set()
+
+
+def _record(name, delta=None):
+    '''Учитывает пересчет длительностью delta или выдачу устаревшего.'''
+    cache = namespace('core')
+    if delta is None:
+        # устаревшее отдается только после пересчета, имя уже в списке
+        _incr(cache, _counter_key(name, 'stale'))
+        return
+    _register(cache, name)
+    micros = round(delta * 1e6)
+    _incr(cache, _counter_key(name, 'count'))
+    _incr(cache, _counter_key(name, 'total'), micros)
+    # максимум приблизительный: одновременные пересчеты могут затереть
+    # друг друга, зато он пишется, только когда растет
+    key = _counter_key(name, 'max')
+    if micros > (cache.get(key) or 0):
+        cache.set(key, micros, None)
+
+
+def metrics():
+    cache = namespace('core')
+    metrics = {}
+    for name in cache.get(METRICS_KEY) or ():
+        values = cache.get_many(
+            [_counter_key(name, counter) for counter in COUNTERS])
+        metric = {
+            counter: values.get(_counter_key(name, counter), 0)
+            for counter in COUNTERS
+        }
+        metric['total'] /= 1e6
+        metric['max'] /= 1e6
+        metrics[name] = metric
+    return metrics
+
+
+def put(cache, key, value, timeout, delta=0.0, stale_ttl=STALE_TTL):
+    '''Записывает значение в формате get_or_refresh.'''
+    cache.set(key, (value, time.time() + timeout, delta),
+              timeout + stale_ttl)
+
+
+def get_or_refresh(cache, key, compute, timeout, stale_ttl=STALE_TTL,
+                   beta=BETA, metric=None):
+    name = metric or key.split(':', 1)[0]
+    entry = cache.get(key)
+    if entry is not None:
+        value, expires, delta = entry
+        if not _expired(expires, delta, beta):
+            return value
+        if not cache.add(_lock_key(key), True, LOCK_TIMEOUT):
+            _record(name)
+            return value
+    elif not cache.add(_lock_key(key), True, LOCK_TIMEOUT):
+        entry = _wait(cache, key)
+        if entry is not None:
+            return entry[0]
+        return compute()
+    try:
+        started = time.monotonic()
+        value = compute()
+        delta = time.monotonic() - started
+        put(cache, key, value, timeout, delta, stale_ttl)
+    finally:
+        cache.delete(_lock_key(key))
+    _record(name, delta)
+    return value
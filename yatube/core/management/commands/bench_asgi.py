@@ -0,0 +1,105 @@
+import asyncio
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi import AsgiHandler
+
+
+def make_scope(path):
+    return {
+        'type': 'http',
+        'method': 'GET',
+        'path': path,
+        'query_string': b'',
+        'headers': [(b'host', b'localhost')],
+        'server': ('localhost', 80),
+        'client': ('127.0.0.1', 0),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает WSGI в пуле потоков и ASGI на одинаковых данных '
+        'при медленных клиентах'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument(
+            '--delay', type=float, default=0.5,
+            help='Сколько секунд клиент отправляет запрос и читает ответ',
+        )
+
+    def run_wsgi(self, app, options):
+        '''Поток занят клиентом на все время обмена, как в sync-воркере.'''
+        environ = AsgiHandler.environ(
+            make_scope(options['path']), io.BytesIO())
+
+        def request():
+            time.sleep(options['delay'])
+            chunks = app(dict(environ), lambda status, headers: None)
+            try:
+                for _ in chunks:
+                    pass
+                time.sleep(options['delay'])
+            finally:
+                chunks.close()
+
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            for future in [pool.submit(request)
+                           for _ in range(options['requests'])]:
+                future.result()
+
+    async def run_asgi(self, handler, options):
+        delay = options['delay']
+
+        async def request(scope):
+            body_sent = False
+
+            async def receive():
+                nonlocal body_sent
+                if body_sent:
+                    # после тела сервер отдает только http.disconnect
+                    await asyncio.Event().wait()
+                body_sent = True
+                await asyncio.sleep(delay)
+                return {'type': 'http.request', 'body': b''}
+
+            await handler(scope, receive, send)
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                await asyncio.sleep(delay)
+
+        await asyncio.gather(*(
+            request(make_scope(options['path']))
+            for _ in range(options['requests'])
+        ))
+
+    def handle(self, *args, **options):
+        app = get_wsgi_application()
+        handler = AsgiHandler(
+            app, ThreadPoolExecutor(max_workers=options['threads']))
+        results = {}
+        started = time.perf_counter()
+        self.run_wsgi(app, options)
+        results['WSGI (потоки)'] = time.perf_counter() - started
+        started = time.perf_counter()
+        asyncio.run(self.run_asgi(handler, options))
+        results['ASGI'] = time.perf_counter() - started
+        self.stdout.write(
+            f'{options["requests"]} запросов к {options["path"]}, '
+            f'потоков: {options["threads"]}, '
+            f'задержка клиента: {options["delay"]} с'
+        )
+        for name, seconds in results.items():
+            self.stdout.write(
+                f'{name:>14}: {seconds:6.2f} с, '
+                f'{options["requests"] / seconds:7.1f} запросов/с'
+            )
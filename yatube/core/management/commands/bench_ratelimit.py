@@ -0,0 +1,61 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+
+from core import ratelimit
+from core.cache import namespace
+
+
+class User(AnonymousUser):
+    '''Вошедший пользователь без обращения к базе.'''
+    is_authenticated = True
+
+    def __init__(self, pk):
+        self.pk = self.id = pk
+
+
+class Command(BaseCommand):
+    help = (
+        'Меряет время проверки лимита записей на пользователя и IP '
+        'для кэша текущего профиля'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checks', type=int, default=20000)
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--runs', type=int, default=5)
+
+    def run(self, requests, checks):
+        started = time.perf_counter()
+        for i in range(checks):
+            ratelimit.check(requests[i % len(requests)], 'bench')
+        return (time.perf_counter() - started) / checks
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        requests = []
+        for pk in range(1, options['users'] + 1):
+            address = f'10.0.{pk // 256}.{pk % 256}'
+            request = factory.post('/', REMOTE_ADDR=address)
+            request.user = User(pk)
+            requests.append(request)
+        # лимит не достигается: меряется обычный путь add + incr + get
+        rates = {'bench': {'user': '1000000/m', 'ip': '1000000/m'}}
+        cache = namespace('core')
+        with override_settings(RATELIMITS=rates):
+            runs = [
+                self.run(requests, options['checks'])
+                for _ in range(options['runs'])
+            ]
+        self.stdout.write(
+            f'Кэш {settings.CACHE_PROFILE} '
+            f'({type(cache).__module__}.{type(cache).__name__})')
+        self.stdout.write(
+            f'Проверка лимитов пользователя и IP: медиана '
+            f'{statistics.median(runs) * 1e6:.1f} мкс, '
+            f'лучший запуск {min(runs) * 1e6:.1f} мкс '
+            f'({options["runs"]} запусков по {options["checks"]})')
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from core import cache
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает время пересчета кэшированных значений и число '
+        'выдач устаревших'
+    )
+
+    def handle(self, *args, **options):
+        metrics = cache.metrics()
+        if not metrics:
+            self.stdout.write('Пересчетов не было')
+        for name, metric in sorted(metrics.items()):
+            average = metric['total'] / max(metric['count'], 1)
+            self.stdout.write(
+                f'{name}: пересчетов {metric["count"]}, '
+                f'в среднем {average * 1000:.1f} мс, '
+                f'максимум {metric["max"] * 1000:.1f} мс, '
+                f'устаревших выдач {metric["stale"]}'
+            )
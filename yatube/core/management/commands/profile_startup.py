@@ -0,0 +1,118 @@
+import json
+import re
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# запускается в отдельном процессе: холодный старт с пустым sys.modules
+CHILD = '''
+import json, sys, time
+started = time.perf_counter()
+
+def since(start):
+    return (time.perf_counter() - start) * 1000
+
+from core import startup
+
+optimized = sys.argv[1] == 'optimized'
+import django
+from django.apps import AppConfig
+
+ready = {}
+create = AppConfig.create.__func__
+
+def timed_create(cls, entry):
+    app_config = create(cls, entry)
+    original = app_config.ready
+
+    def timed_ready():
+        start = time.perf_counter()
+        original()
+        ready[app_config.label] = since(start)
+    app_config.ready = timed_ready
+    return app_config
+
+AppConfig.create = classmethod(timed_create)
+django.setup()
+result = {'setup': since(started), 'ready': ready, 'preload': 0}
+if optimized:
+    start = time.perf_counter()
+    startup.warm_up()
+    startup.warm_worker()
+    result['preload'] = since(start)
+
+start = time.perf_counter()
+startup.render(sys.argv[2])
+result['request'] = since(start)
+result['total'] = since(started)
+print(json.dumps(result))
+'''
+
+IMPORT_TIME = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)')
+MODES = ('default', 'optimized')
+
+
+class Command(BaseCommand):
+    help = (
+        'Профилирует холодный старт: время импорта модулей, '
+        'AppConfig.ready и первого запроса, обычный и быстрый режимы'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=7)
+        parser.add_argument('--top', type=int, default=15)
+        parser.add_argument(
+            '--path', default='/about/author/',
+            help='Адрес первого запроса',
+        )
+
+    def run(self, mode, path):
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', CHILD, mode, path],
+            cwd=settings.BASE_DIR, capture_output=True,
+            text=True, check=True,
+        )
+        imports = [
+            (int(own), int(cumulative), len(indent) // 2, name)
+            for own, cumulative, indent, name
+            in IMPORT_TIME.findall(completed.stderr)
+        ]
+        return json.loads(completed.stdout.splitlines()[-1]), imports
+
+    def handle(self, *args, **options):
+        runs = {mode: [] for mode in MODES}
+        for _ in range(options['runs']):
+            # режимы чередуются, чтобы фоновая нагрузка делилась поровну
+            for mode in MODES:
+                runs[mode].append(self.run(mode, options['path']))
+
+        result, imports = runs['default'][-1]
+        self.stdout.write('Самые долгие импорты (мс, свое / с зависимостями):')
+        for own, cumulative, _, name in sorted(imports, reverse=True)[
+                :options['top']]:
+            self.stdout.write(
+                f'  {own / 1000:7.1f} {cumulative / 1000:7.1f}  {name}')
+        self.stdout.write('Импорты верхнего уровня (мс):')
+        top_level = [row for row in imports if row[2] == 0]
+        for _, cumulative, _, name in sorted(
+                top_level, key=lambda row: row[1], reverse=True)[
+                :options['top']]:
+            self.stdout.write(f'  {cumulative / 1000:7.1f}  {name}')
+        self.stdout.write('AppConfig.ready (мс):')
+        for label, elapsed in sorted(
+                result['ready'].items(), key=lambda item: -item[1]):
+            self.stdout.write(f'  {elapsed:7.1f}  {label}')
+
+        self.stdout.write(
+            f'Медиана по {options["runs"]} запускам (мс): '
+            'setup / preload / первый запрос / всего')
+        for mode in MODES:
+            values = [
+                statistics.median(result[key] for result, _ in runs[mode])
+                for key in ('setup', 'preload', 'request', 'total')
+            ]
+            self.stdout.write(
+                f'  {mode:9} ' + ' / '.join(f'{v:.0f}' for v in values))
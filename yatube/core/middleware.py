@@ -0,0 +1,126 @@
+'''Раздача статики приложением для установок без nginx.
+
+StaticFilesMiddleware включается настройкой STATIC_SERVE и отдает файлы
+из STATIC_ROOT раньше сессий и разбора URL. Если клиент принимает
+сжатие, отдается заранее сжатая копия name.br или name.gz из
+collectstatic (core.storage.CompressedManifestStorage). Файлы с хэшем в
+имени кэшируются браузером на год без перепроверки, остальные - на
+STATIC_MAX_AGE секунд.
+'''
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# расширение сжатой копии по кодировке, в порядке предпочтения
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepted_encodings(header):
+    '''Кодировки из Accept-Encoding, кроме запрещенных q=0.'''
+    encodings = set()
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        params = params.strip().replace(' ', '')
+        if params.startswith('q='):
+            try:
+                if float(params[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        encodings.add(coding.strip().lower())
+    return encodings
+
+
+class StaticFile:
+    '''Файл статики и его сжатые копии; строится один раз на имя.'''
+
+    def __init__(self, path):
+        self.path = path
+        stat = os.stat(path)
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        self.content_type = (
+            mimetypes.guess_type(path)[0] or 'application/octet-stream')
+        self.variants = [
+            (encoding, path + extension)
+            for encoding, extension in ENCODINGS
+            if os.path.isfile(path + extension)
+        ]
+
+    def choose(self, accept_encoding):
+        '''(путь, кодировка) лучшего варианта для Accept-Encoding.'''
+        if self.variants:
+            accepted = accepted_encodings(accept_encoding)
+            for encoding, path in self.variants:
+                if encoding in accepted or '*' in accepted:
+                    return path, encoding
+        return self.path, None
+
+
+class StaticFilesMiddleware:
+    def __init__(self, get_response):
+        if not settings.STATIC_SERVE or not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.root = settings.STATIC_ROOT
+        # имена с хэшем содержимого из манифеста collectstatic
+        self.immutable = set(
+            getattr(staticfiles_storage, 'hashed_files', {}).values())
+        self.files = {}
+
+    def __call__(self, request):
+        if (request.method in ('GET', 'HEAD')
+                and request.path_info.startswith(self.prefix)):
+            name = request.path_info[len(self.prefix):]
+            static_file = self.find(name)
+            if static_file is not None:
+                return self.serve(request, name, static_file)
+        return self.get_response(request)
+
+    def find(self, name):
+        if name not in self.files:
+            try:
+                path = safe_join(self.root, name)
+            except (SuspiciousFileOperation, ValueError):
+                return None
+            if (not os.path.isfile(path)
+                    or path.endswith(tuple(ext for _, ext in ENCODINGS))):
+                return None
+            # статика меняется только с выкладкой, а с ней и процесс
+            self.files[name] = StaticFile(path)
+        return self.files[name]
+
+    def serve(self, request, name, static_file):
+        cache_control = (
+            IMMUTABLE if name in self.immutable
+            else f'public, max-age={settings.STATIC_MAX_AGE}')
+        if not was_modified_since(
+                request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                static_file.mtime, static_file.size):
+            response = HttpResponseNotModified()
+        else:
+            path, encoding = static_file.choose(
+                request.META.get('HTTP_ACCEPT_ENCODING', ''))
+            if request.method == 'HEAD':
+                response = HttpResponse(
+                    content_type=static_file.content_type)
+                response['Content-Length'] = os.path.getsize(path)
+            else:
+                response = FileResponse(
+                    open(path, 'rb'), content_type=static_file.content_type)
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['Last-Modified'] = http_date(static_file.mtime)
+        response['Cache-Control'] = cache_control
+        if static_file.variants:
+            response['Vary'] = 'Accept-Encoding'
+        return response
@@ -0,0 +1,71 @@
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+
+class CursorPage:
+    '''Страница курсорной пагинации.
+
+    В отличие от Page не знает общего числа записей и номеров страниц,
+    зато не выполняет COUNT и OFFSET по всей таблице.
+    '''
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def parse_cursor(value):
+    '''Курсор - целое число; мусор в параметре считаем его отсутствием.'''
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def cursor_paginate(queryset, cursor, per_page, field='pk'):
+    '''Возвращает записи с field < cursor по убыванию field.
+
+    Вместо OFFSET используется условие по индексированному полю,
+    поэтому стоимость страницы не зависит от её глубины.
+    '''
+    if cursor is not None:
+        queryset = queryset.filter(**{f'{field}__lt': cursor})
+    rows = list(queryset.order_by(f'-{field}')[:per_page + 1])
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = getattr(rows[-1], field)
+    return CursorPage(rows, next_cursor)
+
+
+def cursor_paginator(request, queryset, per_page, field='pk'):
+    cursor = parse_cursor(request.GET.get('cursor'))
+    return cursor_paginate(queryset, cursor, per_page, field)
+
+
+class EstimatedCountPaginator(Paginator):
+    '''Paginator без COUNT по всей таблице.
+
+    Точно считаются только первые COUNT_LIMIT записей. Если их больше,
+    число оценивается сверху наибольшим pk выборки: последние страницы
+    могут оказаться пустыми, зато стоимость не растет с таблицей.
+    '''
+    COUNT_LIMIT = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list.order_by()
+        capped = queryset[:self.COUNT_LIMIT].count()
+        if capped < self.COUNT_LIMIT:
+            return capped
+        last = queryset.order_by('-pk').values_list('pk', flat=True).first()
+        return max(capped, last or 0)
@@ -0,0 +1,104 @@
+'''Ограничение частоты записей по пользователю и IP.
+
+Скользящее окно приближается двумя фиксированными: к счетчику текущего
+окна добавляется счетчик предыдущего с весом еще не прошедшей его доли.
+Счетчик увеличивается атомарным cache.incr, поэтому проверка стоит
+одного add, одного incr и одного get в пространстве имен core; в
+профиле shared лимит общий для всех процессов. Если запрос отклонен
+одним из лимитов, уже учтенные им счетчики других лимитов
+откатываются. Скорость проверки меряет команда ``bench_ratelimit``.
+
+Лимиты задаются в settings.RATELIMITS по областям (post, comment,
+follow) отдельно для пользователя и для IP в виде «число/период», где
+период - s, m, h или d.
+'''
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+
+from .cache import namespace
+from .views import too_many_requests
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+
+def parse_rate(rate):
+    '''10/m -> (10, 60)'''
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def _key(scope, ident, window):
+    return f'ratelimit:{scope}:{ident}:{window}'
+
+
+def hit(scope, ident, rate, now=None):
+    '''Учитывает запрос; возвращает 0 или через сколько секунд повторить.'''
+    limit, period = parse_rate(rate)
+    now = time.time() if now is None else now
+    window = int(now // period)
+    elapsed = now - window * period
+    cache = namespace('core')
+    key = _key(scope, ident, window)
+    cache.add(key, 0, period * 2)
+    current = cache.incr(key)
+    previous = cache.get(_key(scope, ident, window - 1), 0)
+    if previous * (1 - elapsed / period) + current <= limit:
+        return 0
+    # отклоненный запрос не расходует лимит
+    cache.decr(key)
+    current -= 1
+    if previous and current < limit:
+        # ждем, пока вес предыдущего окна не освободит место
+        wait = period * (1 - (limit - current - 1) / previous) - elapsed
+    else:
+        wait = period - elapsed
+    return max(1, math.ceil(wait))
+
+
+def release(scope, ident, rate, now):
+    '''Возвращает запрос, учтенный hit() в момент now.'''
+    _, period = parse_rate(rate)
+    try:
+        namespace('core').decr(_key(scope, ident, int(now // period)))
+    except ValueError:
+        pass
+
+
+def identities(request):
+    if request.user.is_authenticated:
+        yield 'user', request.user.pk
+    yield 'ip', request.META.get('REMOTE_ADDR', '')
+
+
+def check(request, scope):
+    '''0, если запрос укладывается в лимиты области, иначе Retry-After.'''
+    rates = settings.RATELIMITS.get(scope, {})
+    now = time.time()
+    counted = []
+    for kind, ident in identities(request):
+        if kind in rates:
+            ident = f'{kind}:{ident}'
+            wait = hit(scope, ident, rates[kind], now)
+            if wait:
+                for ident, rate in counted:
+                    release(scope, ident, rate, now)
+                return wait
+            counted.append((ident, rates[kind]))
+    return 0
+
+
+def ratelimit(scope, methods=('POST',)):
+    '''Отвечает 429, если запрос превышает лимиты области scope.'''
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods:
+                wait = check(request, scope)
+                if wait:
+                    return too_many_requests(request, wait)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
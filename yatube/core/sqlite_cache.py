@@ -0,0 +1,157 @@
+'''Кэш в локальном файле SQLite, общий для процессов одной машины.
+
+В отличие от FileBasedCache, где ключ - отдельный файл, а incr - это
+get и set без блокировки, здесь add и incr выполняются в транзакции
+BEGIN IMMEDIATE и атомарны между процессами, а целые числа хранятся
+без pickle. Журнал WAL позволяет читать, пока другой процесс пишет.
+'''
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+INT64 = range(-2 ** 63, 2 ** 63)
+# доля записей, после которых проверяется размер кэша
+CULL_PROBABILITY = 0.01
+
+
+def _encode(value):
+    if type(value) is int and value in INT64:
+        return value
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def _decode(value):
+    return value if isinstance(value, int) else pickle.loads(value)
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.path = location
+        self.local = threading.local()
+
+    @property
+    def connection(self):
+        '''Соединение текущего потока в режиме автокоммита.'''
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            connection = sqlite3.connect(
+                self.path, timeout=10, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache '
+                '(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)')
+            self.local.connection = connection
+        return connection
+
+    def disconnect(self):
+        '''Закрывает соединение текущего потока, например перед fork.'''
+        connection = self.local.__dict__.pop('connection', None)
+        if connection is not None:
+            connection.close()
+
+    @contextmanager
+    def transaction(self):
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def get(self, key, default=None, version=None):
+        row = self.connection.execute(
+            'SELECT value FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self._key(key, version), time.time()),
+        ).fetchone()
+        return default if row is None else _decode(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.connection.execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires) '
+            'VALUES (?, ?, ?)',
+            (self._key(key, version), _encode(value),
+             self.get_backend_timeout(timeout)),
+        )
+        self._cull()
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        with self.transaction() as connection:
+            connection.execute(
+                'DELETE FROM cache WHERE key = ? AND expires <= ?',
+                (key, time.time()))
+            cursor = connection.execute(
+                'INSERT OR IGNORE INTO cache (key, value, expires) '
+                'VALUES (?, ?, ?)',
+                (key, _encode(value), self.get_backend_timeout(timeout)),
+            )
+        return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        with self.transaction() as connection:
+            connection.execute(
+                'UPDATE cache SET value = value + ? WHERE key = ? '
+                "AND typeof(value) = 'integer' "
+                'AND (expires IS NULL OR expires > ?)',
+                (delta, key, time.time()),
+            )
+            row = connection.execute(
+                'SELECT value FROM cache WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                (key, time.time()),
+            ).fetchone()
+        if row is None:
+            raise ValueError(f"Key '{key}' not found")
+        return _decode(row[0])
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        cursor = self.connection.execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), self._key(key, version),
+             time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key, version=None):
+        self.connection.execute(
+            'DELETE FROM cache WHERE key = ?', (self._key(key, version),))
+
+    def has_key(self, key, version=None):
+        return self.get(key, version=version) is not None
+
+    def clear(self):
+        self.connection.execute('DELETE FROM cache')
+
+    def _cull(self):
+        '''Изредка удаляет истекшие ключи и лишние сверх MAX_ENTRIES.'''
+        if random.random() >= CULL_PROBABILITY:
+            return
+        connection = self.connection
+        connection.execute(
+            'DELETE FROM cache WHERE expires <= ?', (time.time(),))
+        count, = connection.execute('SELECT count(*) FROM cache').fetchone()
+        if count > self._max_entries:
+            connection.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                'ORDER BY expires IS NULL, expires LIMIT ?)',
+                (count // self._cull_frequency,),
+            )
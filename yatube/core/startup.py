@@ -0,0 +1,141 @@
+'''Быстрый запуск процессов приложения.
+
+warm_up() выполняется в мастер-процессе (gunicorn --preload), если
+включен STARTUP_PRELOAD: резолверы URL, регулярные выражения маршрутов,
+скомпилированные шаблоны и, по желанию, кэш первой страницы главной
+достаются воркерам после fork готовыми, а не строятся первым запросом
+каждого воркера. Соединения с базой, кэшами SQLite и хранилищем
+миниатюр мастер закрывает, а каждый воркер открывает свои в
+warm_worker() (хук post_fork в gunicorn.conf.py).
+Pillow и движок sorl-thumbnail не загружаются при запуске - только при
+первой обработке картинки или миниатюры.
+'''
+import io
+import os
+import sys
+
+# пространства имен, маршруты которых компилируются заранее
+WARM_NAMESPACES = ('posts', 'users', 'about')
+
+
+def project_templates(engine):
+    '''Имена шаблонов из каталогов DIRS движка.'''
+    for directory in engine.dirs:
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if name.endswith('.html'):
+                    path = os.path.join(root, name)
+                    yield os.path.relpath(path, directory).replace(
+                        os.sep, '/')
+
+
+def preload():
+    '''Строит резолверы URL и компилирует шаблоны проекта.
+
+    Возвращает число скомпилированных шаблонов. Без кэширующего
+    загрузчика (DEBUG) компиляция лишь импортирует библиотеки тегов.
+    '''
+    from django.template import engines
+    from django.urls import get_resolver
+
+    # reverse_dict заполняет и вложенные резолверы include()
+    get_resolver().reverse_dict
+    compiled = 0
+    for backend in engines.all():
+        engine = getattr(backend, 'engine', None)
+        if engine is None:
+            continue
+        for name in project_templates(engine):
+            engine.get_template(name)
+            compiled += 1
+    return compiled
+
+
+def compile_urls(namespaces=WARM_NAMESPACES):
+    '''Компилирует регулярные выражения маршрутов namespaces.
+
+    Django компилирует выражение маршрута при первом сопоставлении с
+    ним, поэтому без этого первые запросы воркера платят за все
+    маршруты, стоящие в urlpatterns перед нужным.
+    '''
+    from django.urls import URLResolver, get_resolver
+
+    def walk(patterns):
+        count = 0
+        for pattern in patterns:
+            pattern.pattern.regex
+            count += 1
+            if isinstance(pattern, URLResolver):
+                count += walk(pattern.url_patterns)
+        return count
+
+    return walk(
+        pattern for pattern in get_resolver().url_patterns
+        if getattr(pattern, 'namespace', None) in namespaces
+    )
+
+
+def render(path):
+    '''GET-запрос path через WSGI-обработчик без сервера; код ответа.'''
+    from django.core.handlers.wsgi import WSGIHandler
+
+    status = []
+    chunks = WSGIHandler()({
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path,
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '80',
+        'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+    }, lambda code, headers: status.append(code))
+    try:
+        b''.join(chunks)
+    finally:
+        chunks.close()
+    return int(status[0].split(' ', 1)[0])
+
+
+def close_connections():
+    '''Закрывает соединения с базой, кэшами SQLite и хранилищем миниатюр.
+
+    Соединение SQLite нельзя использовать в процессе, порожденном fork,
+    а сокет базы, доставшийся нескольким воркерам, ломает протокол.
+    '''
+    from django.conf import settings
+    from django.core.cache import caches
+    from django.db import connections
+    from django.utils.functional import empty
+    from sorl.thumbnail import default
+
+    connections.close_all()
+    for alias in settings.CACHES:
+        disconnect = getattr(caches[alias], 'disconnect', None)
+        if disconnect is not None:
+            disconnect()
+    if default.kvstore._wrapped is not empty:
+        disconnect = getattr(default.kvstore, 'disconnect', None)
+        if disconnect is not None:
+            disconnect()
+
+
+def warm_up(render_index=False):
+    '''Готовит мастер-процесс к fork воркеров.
+
+    С render_index первая страница главной рендерится один раз, и ее
+    фрагмент попадает в кэш до первого посетителя; если главная не
+    отдается, запуск прерывается.
+    '''
+    try:
+        preload()
+        compile_urls()
+        status = render('/') if render_index else 200
+    finally:
+        close_connections()
+    if status != 200:
+        raise RuntimeError(f'Главная при прогреве вернула {status}')
+
+
+def warm_worker():
+    '''Открывает соединения с базой в только что запущенном воркере.'''
+    from django.db import connections
+
+    for connection in connections.all():
+        connection.ensure_connection()
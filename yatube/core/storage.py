@@ -0,0 +1,117 @@
+import gzip
+import hashlib
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# статика, которую имеет смысл сжимать; картинки уже сжаты
+COMPRESSIBLE = ('.css', '.js', '.map', '.svg', '.json', '.txt', '.html')
+# файлы меньше этого не сжимаем: выигрыш меньше заголовков
+MIN_COMPRESS_SIZE = 256
+
+
+def content_hash(content):
+    '''SHA-256 содержимого файла, прочитанного по частям.'''
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+def hashed_name(name, digest):
+    '''posts/photo.JPG -> posts/ab/abcdef....jpg'''
+    directory, filename = os.path.split(name)
+    extension = os.path.splitext(filename)[1].lower()
+    return os.path.join(directory, digest[:2], digest + extension)
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    '''Хранилище, именующее файлы по хэшу содержимого.
+
+    Одинаковые загрузки получают одно имя и хранятся один раз, поэтому
+    и миниатюры sorl-thumbnail строятся один раз на уникальную картинку.
+    Файлы могут разделяться несколькими постами, удалять их можно только
+    после сверки ссылок.
+    '''
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = hashed_name(name, content_hash(content))
+        try:
+            # свежее время изменения бережет файл от сборки media_gc,
+            # пока новый пост с ним еще не сохранен
+            os.utime(self.path(name))
+            return name
+        except FileNotFoundError:
+            return self._save(name, content)
+
+
+def compressed_variants(data):
+    '''{расширение: сжатые данные} для вариантов, которые меньше data.'''
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data)
+    return {
+        extension: compressed for extension, compressed in variants.items()
+        if len(compressed) < len(data)
+    }
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    '''Статика с хэшем содержимого в имени и сжатыми копиями.
+
+    collectstatic кладет рядом с каждым текстовым файлом name.gz и, если
+    установлен пакет brotli, name.br - их отдает core.middleware.
+    StaticFilesMiddleware по Accept-Encoding без сжатия на лету. Файл,
+    которого нет в манифесте (collectstatic не запускался, например в
+    тестах), получает URL без хэша.
+    '''
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in paths:
+            key = self.hash_key(self.clean_name(name))
+            for stored in {name, self.hashed_files.get(key)} - {None}:
+                for compressed in self.compress(stored):
+                    yield stored, compressed, True
+
+    def compress(self, name):
+        '''Пишет сжатые копии файла name; возвращает их имена.'''
+        if not name.endswith(COMPRESSIBLE) or not self.exists(name):
+            return []
+        with self.open(name) as original:
+            data = original.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return []
+        names = []
+        for extension, compressed in compressed_variants(data).items():
+            if self.exists(name + extension):
+                self.delete(name + extension)
+            names.append(self._save(name + extension, ContentFile(compressed)))
+        return names
@@ -0,0 +1,44 @@
+from django import template
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+from core.cache import get_or_refresh
+
+register = template.Library()
+
+
+class SwrCacheNode(template.Node):
+    def __init__(self, nodelist, timeout, name, vary_on):
+        self.nodelist = nodelist
+        self.timeout = timeout
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        timeout = int(self.timeout.resolve(context))
+        key = make_template_fragment_key(
+            self.name, [var.resolve(context) for var in self.vary_on])
+        # фрагменты живут в кэше по умолчанию, как у {% cache %}
+        return get_or_refresh(
+            cache, key, lambda: self.nodelist.render(context), timeout,
+            metric=f'fragment.{self.name}')
+
+
+@register.tag
+def swrcache(parser, token):
+    '''Как {% cache %}, но отдает устаревший фрагмент во время пересчета.
+
+    {% swrcache 20 index_page page_obj.number %} ... {% endswrcache %}
+    '''
+    nodelist = parser.parse(('endswrcache',))
+    parser.delete_first_token()
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(
+            f'{bits[0]} принимает не меньше двух аргументов')
+    return SwrCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        bits[2],
+        [parser.compile_filter(bit) for bit in bits[3:]],
+    )
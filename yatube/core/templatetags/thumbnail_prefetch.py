@@ -0,0 +1,12 @@
+from django import template
+
+from core.thumbnail_kvstore import prefetch
+
+register = template.Library()
+
+
+@register.simple_tag
+def prefetch_thumbnails(posts, geometry_string, **options):
+    '''Загружает метаданные миниатюр всей страницы одним запросом.'''
+    prefetch((post.image for post in posts), geometry_string, **options)
+    return ''
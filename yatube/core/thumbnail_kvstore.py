@@ -0,0 +1,152 @@
+'''Хранилище метаданных sorl-thumbnail в локальном файле SQLite.
+
+Стандартный cached_db KVStore ходит в базу при каждом промахе
+LocMemCache, а у каждого процесса кэш свой и после перезапуска пустой.
+Здесь записи лежат в одном файле THUMBNAIL_KVSTORE_PATH, общем для всех
+процессов на машине и переживающем перезапуски, а найденные значения
+запоминаются в процессе. prefetch() загружает миниатюры целой страницы
+одним запросом, после чего {% thumbnail %} в цикле базу не трогает.
+'''
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import defaults as thumbnail_defaults
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import KVStoreBase, add_prefix
+
+MEMO_SIZE = 10000
+# предел числа параметров запроса в старых сборках SQLite
+BATCH_SIZE = 500
+
+
+class KVStore(KVStoreBase):
+    def __init__(self):
+        super().__init__()
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.memo = OrderedDict()
+
+    @property
+    def connection(self):
+        '''Соединение текущего потока с файлом хранилища.'''
+        path = settings.THUMBNAIL_KVSTORE_PATH
+        connections = self.local.__dict__.setdefault('connections', {})
+        if path not in connections:
+            connection = sqlite3.connect(path, timeout=10)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS kvstore '
+                '(key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+            connections[path] = connection
+        return connections[path]
+
+    def disconnect(self):
+        '''Закрывает соединения текущего потока, например перед fork.'''
+        for connection in self.local.__dict__.pop('connections', {}).values():
+            connection.close()
+
+    def remember(self, key, value):
+        with self.lock:
+            self.memo[key] = value
+            self.memo.move_to_end(key)
+            if len(self.memo) > MEMO_SIZE:
+                self.memo.popitem(last=False)
+
+    def forget(self, keys):
+        with self.lock:
+            for key in keys:
+                self.memo.pop(key, None)
+
+    def prefetch(self, keys):
+        '''Загружает значения ключей одним запросом на пачку.'''
+        raw_keys = [
+            add_prefix(key) for key in keys
+            if add_prefix(key) not in self.memo
+        ]
+        for start in range(0, len(raw_keys), BATCH_SIZE):
+            batch = raw_keys[start:start + BATCH_SIZE]
+            placeholders = ', '.join('?' * len(batch))
+            rows = self.connection.execute(
+                'SELECT key, value FROM kvstore '
+                f'WHERE key IN ({placeholders})',
+                batch,
+            )
+            for key, value in rows:
+                self.remember(key, value)
+
+    def clear(self):
+        prefix = thumbnail_settings.THUMBNAIL_KEY_PREFIX
+        with self.connection:
+            self.connection.execute(
+                'DELETE FROM kvstore WHERE substr(key, 1, ?) = ?',
+                (len(prefix), prefix),
+            )
+        with self.lock:
+            self.memo.clear()
+
+    def _get_raw(self, key):
+        value = self.memo.get(key)
+        if value is not None:
+            return value
+        row = self.connection.execute(
+            'SELECT value FROM kvstore WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            # промах не запоминаем: миниатюру может создать другой процесс
+            return None
+        self.remember(key, row[0])
+        return row[0]
+
+    def _set_raw(self, key, value):
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO kvstore (key, value) VALUES (?, ?)',
+                (key, value),
+            )
+        self.remember(key, value)
+
+    def _delete_raw(self, *keys):
+        with self.connection:
+            self.connection.executemany(
+                'DELETE FROM kvstore WHERE key = ?', [(key,) for key in keys])
+        self.forget(keys)
+
+    def _find_keys_raw(self, prefix):
+        rows = self.connection.execute(
+            'SELECT key FROM kvstore WHERE substr(key, 1, ?) = ?',
+            (len(prefix), prefix),
+        )
+        return [key for key, in rows]
+
+
+def thumbnail_key(file_, geometry_string, **options):
+    '''Ключ, под которым get_thumbnail ищет миниатюру.
+
+    Повторяет подготовку параметров из sorl.thumbnail.base.
+    '''
+    backend = default.backend
+    source = ImageFile(file_)
+    if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(thumbnail_settings, attr)
+        if value != getattr(thumbnail_defaults, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(source, geometry_string, options)
+    return ImageFile(name, default.storage).key
+
+
+def prefetch(files, geometry_string, **options):
+    '''Загружает метаданные миниатюр для всех файлов разом.'''
+    kvstore = default.kvstore
+    if not hasattr(kvstore, 'prefetch'):
+        return
+    kvstore.prefetch([
+        thumbnail_key(file_, geometry_string, **options)
+        for file_ in files if file_
+    ])
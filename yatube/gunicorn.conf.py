@@ -0,0 +1,24 @@
+'''Настройки gunicorn; читаются сами при запуске из этого каталога.
+
+    gunicorn yatube.wsgi
+
+Приложение загружается в мастер-процессе и прогревается до fork
+(core.startup.warm_up), а каждый воркер после fork открывает свои
+соединения с базой. Воркеров несколько, поэтому кэш по умолчанию общий
+(CACHE_PROFILE=shared): иначе сброс лент, счетчиков и черновиков по
+сигналам видел бы только воркер, обработавший запрос.
+'''
+import os
+
+os.environ.setdefault('STARTUP_PRELOAD', '1')
+os.environ.setdefault('CACHE_PROFILE', 'shared')
+
+bind = os.environ.get('BIND', '127.0.0.1:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+preload_app = True
+
+
+def post_fork(server, worker):
+    from core import startup
+
+    startup.warm_worker()
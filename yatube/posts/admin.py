@@ -1,20 +1,123 @@
-from django.contrib import admin
+from core.admin import CursorModelAdmin, SelectedRelatedFilter, filter_link
+from core.pagination import EstimatedCountPaginator
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.core.exceptions import ValidationError
 
-from .models import Group, Post
+from . import moderation
+from .models import Comment, Follow, Group, Post
+
+
+class PostActionForm(ActionForm):
+    group = forms.ModelChoiceField(
+        Group.objects.only('title'),
+        required=False,
+        empty_label='без группы',
+        label='Группа',
+    )
 
 
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
+    # фильтр и date_hierarchy выбирают диапазоны по индексу pub_date
     list_filter = ('pub_date',)
-    list_editable = ('group',)
+    date_hierarchy = 'pub_date'
+    autocomplete_fields = ('author', 'group')
     empty_value_display = '-пусто-'
+    # число строк оценивается, полный COUNT таблицы не выполняется
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    action_form = PostActionForm
+    actions = ('move_to_group', 'delete_posts')
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # стандартное удаление загружает каждый пост со связанными
+        actions.pop('delete_selected', None)
+        return actions
+
+    def move_to_group(self, request, queryset):
+        field = self.action_form.base_fields['group']
+        try:
+            group = field.clean(request.POST.get('group'))
+        except ValidationError:
+            self.message_user(request, 'Группа не найдена', messages.ERROR)
+            return
+        count = moderation.move_to_group(queryset, group)
+        self.message_user(request, f'Перенесено постов: {count}')
+    move_to_group.short_description = 'Перенести в группу'
+    move_to_group.allowed_permissions = ('change',)
+
+    def delete_posts(self, request, queryset):
+        count = moderation.delete_posts(queryset)
+        self.message_user(
+            request, f'Удалено постов: {count}', messages.SUCCESS)
+    delete_posts.short_description = 'Удалить выбранные посты'
+    delete_posts.allowed_permissions = ('delete',)
 
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('pk', 'title', 'slug', 'description')
-    saerch_fields = ('title')
+    search_fields = ('title',)
+
+
+class CommentAdmin(CursorModelAdmin):
+    list_display = (
+        'pk',
+        'text',
+        filter_link('post', 'Пост'),
+        filter_link('author', 'Автор'),
+        'created',
+    )
+    list_select_related = ('post', 'author')
+    list_filter = (
+        ('post', SelectedRelatedFilter),
+        ('author', SelectedRelatedFilter),
+        'created',
+    )
+    autocomplete_fields = ('post', 'author')
+    actions = ('delete_by_authors',)
+
+    def delete_by_authors(self, request, queryset):
+        authors = set(queryset.values_list('author_id', flat=True))
+        count = moderation.delete_comments_by(authors)
+        self.message_user(
+            request, f'Удалено комментариев: {count}', messages.SUCCESS)
+    delete_by_authors.short_description = (
+        'Удалить все комментарии авторов выбранных')
+    delete_by_authors.allowed_permissions = ('delete',)
+
+
+class FollowAdmin(CursorModelAdmin):
+    list_display = (
+        'pk',
+        filter_link('user', 'Подписчик'),
+        filter_link('author', 'Автор'),
+        'created',
+    )
+    list_select_related = ('user', 'author')
+    list_filter = (
+        ('user', SelectedRelatedFilter),
+        ('author', SelectedRelatedFilter),
+        'created',
+    )
+    autocomplete_fields = ('user', 'author')
+    actions = ('remove_follows_of_users',)
+
+    def remove_follows_of_users(self, request, queryset):
+        users = set(queryset.values_list('user_id', flat=True))
+        count = moderation.remove_follows_of(users)
+        self.message_user(
+            request, f'Удалено подписок: {count}', messages.SUCCESS)
+    remove_follows_of_users.short_description = (
+        'Удалить все подписки выбранных подписчиков')
+    remove_follows_of_users.allowed_permissions = ('delete',)
 
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(Follow, FollowAdmin)
@@ -0,0 +1,170 @@
+'''Архив старых постов.
+
+Посты старше settings.POSTS_ARCHIVE_AFTER_DAYS вместе с комментариями
+переносятся командой ``archive_posts`` в таблицы ArchivedPost и
+ArchivedComment, поэтому индексы горячей таблицы не растут вместе с
+историей. Перенос идет пачками по BATCH_SIZE, каждая в своей короткой
+транзакции.
+
+Ленты, выгрузки и подписки читают горячую таблицу и переходят в архив,
+только когда страница заходит за последний горячий пост: все архивные
+посты старше горячих, поэтому порядок по pub_date сохраняется. Число
+горячих постов считается каждый раз - это COUNT по индексу, - а число
+архивных кэшируется под версией ленты (feeds.version) и устаревает
+вместе с ней. Срез ленты читается из базы, только когда его
+перебирают, - при закэшированном фрагменте страницы лента не делает
+запросов.
+'''
+import time
+from datetime import timedelta
+
+from core.cache import get_or_refresh, namespace
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import feeds, group_stats, moderation
+from .models import ArchivedComment, ArchivedPost, Comment, Post
+
+BATCH_SIZE = 500
+COUNT_TTL = 60 * 60 * 24
+
+POST_FIELDS = (
+    'id', 'text', 'pub_date', 'created', 'author_id', 'group_id', 'image',
+    'image_width', 'image_height',
+)
+COMMENT_FIELDS = ('id', 'post_id', 'author_id', 'text', 'created')
+
+
+def cutoff(days=None):
+    if days is None:
+        days = settings.POSTS_ARCHIVE_AFTER_DAYS
+    return timezone.now() - timedelta(days=days)
+
+
+def _count_key(scope):
+    return f'archive:count:{scope}:{feeds.version(scope)}'
+
+
+class TieredFeed:
+    '''Лента для Paginator: горячие строки, за ними архивные.
+
+    hot и archived - отфильтрованные querysets без feed_rows(), чтобы
+    COUNT шел без соединений с автором и группой. Ленты без scope
+    (подписки) не кэшируют число архивных постов.
+    '''
+
+    def __init__(self, scope, hot, archived):
+        self.scope = scope
+        self.hot = hot
+        self.archived = archived
+
+    def counts(self):
+        '''(горячих, архивных) постов ленты.'''
+        if not hasattr(self, '_counts'):
+            if self.scope is None:
+                archived = self.archived.count()
+            else:
+                archived = get_or_refresh(
+                    namespace('posts'), _count_key(self.scope),
+                    self.archived.count, COUNT_TTL)
+            self._counts = self.hot.count(), archived
+        return self._counts
+
+    def count(self):
+        return sum(self.counts())
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        return FeedSlice(self, index.start or 0, index.stop)
+
+    def rows(self, start, stop):
+        if stop is None:
+            stop = self.count()
+        boundary = self.counts()[0]
+        rows = []
+        if start < boundary:
+            rows += list(self.hot.feed_rows()[start:min(stop, boundary)])
+        if stop > boundary:
+            rows += list(self.archived.feed_rows()[
+                max(start - boundary, 0):stop - boundary])
+        return rows
+
+    def iterator(self, chunk_size):
+        '''Все строки ленты по порядку, без загрузки в память.'''
+        yield from self.hot.feed_rows().iterator(chunk_size=chunk_size)
+        yield from self.archived.feed_rows().iterator(chunk_size=chunk_size)
+
+
+class FeedSlice:
+    '''Срез ленты, который читается из базы при первом обращении.'''
+
+    def __init__(self, feed, start, stop):
+        self.feed = feed
+        self.start = start
+        self.stop = stop
+
+    def _rows(self):
+        if not hasattr(self, '_cache'):
+            self._cache = self.feed.rows(self.start, self.stop)
+        return self._cache
+
+    def __iter__(self):
+        return iter(self._rows())
+
+    def __len__(self):
+        return len(self._rows())
+
+    def __getitem__(self, index):
+        return self._rows()[index]
+
+
+def feed(scope, **filters):
+    '''Лента FeedRow по filters: index, author:<pk>, group:<pk> или None.'''
+    return TieredFeed(
+        scope,
+        Post.objects.filter(**filters),
+        ArchivedPost.objects.filter(**filters),
+    )
+
+
+def archive_batch(ids):
+    '''Переносит посты ids с комментариями в архив; возвращает их число.'''
+    posts = Post.objects.filter(pk__in=ids).order_by()
+    comments = Comment.objects.filter(post_id__in=ids).order_by()
+    with transaction.atomic():
+        ArchivedPost.objects.bulk_create(
+            ArchivedPost(**row) for row in posts.values(*POST_FIELDS))
+        ArchivedComment.objects.bulk_create(
+            ArchivedComment(**row)
+            for row in comments.values(*COMMENT_FIELDS))
+        return moderation.raw_delete(posts)
+
+
+def archive(days=None, batch_size=BATCH_SIZE, pause=0):
+    '''Переносит в архив все посты старше days дней пачками.'''
+    old = Post.objects.filter(pub_date__lt=cutoff(days)).order_by('pub_date')
+    moved = 0
+    authors, groups = set(), set()
+    while True:
+        batch = list(old.values_list('pk', 'author_id', 'group_id')[
+            :batch_size])
+        if not batch:
+            break
+        moved += archive_batch([pk for pk, _, _ in batch])
+        authors.update(author for _, author, _ in batch)
+        groups.update(group for _, _, group in batch if group)
+        if pause:
+            time.sleep(pause)
+    if moved:
+        group_stats.invalidate()
+        feeds.invalidate(
+            'index',
+            *[f'author:{pk}' for pk in authors],
+            *[f'group:{pk}' for pk in groups],
+        )
+    return moved
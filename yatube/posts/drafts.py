@@ -0,0 +1,138 @@
+'''Черновики новых постов с автосохранением.
+
+Автосохранение пишет черновик в кэш (пространство posts) и кладет его в
+буфер процесса; в базу буфер уходит пачкой - DELETE и INSERT на все
+накопленные черновики, - когда с прошлой записи прошло FLUSH_INTERVAL
+секунд или в нем набралось FLUSH_SIZE пользователей. Проверка идет при
+автосохранении и по окончании каждого запроса (см. signals.py).
+Повторные сохранения одного пользователя между записями схлопываются в
+одну строку.
+
+После публикации строка черновика остается в базе с отметкой
+discarded: по ней write() отбрасывает более старые правки из буферов
+других процессов, а load() - их устаревшие копии в кэше. Если процесс
+завершится, не записав буфер, пропадут правки не старше FLUSH_INTERVAL,
+и то лишь при потере кэша.
+'''
+import threading
+import time
+
+from core.cache import namespace
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Draft
+
+DRAFT_TTL = 60 * 60 * 24 * 7
+FLUSH_INTERVAL = 30
+FLUSH_SIZE = 100
+
+
+def _key(user_id):
+    return f'draft:{user_id}'
+
+
+class DraftBuffer:
+    '''Черновики, ждущие записи в базу: последний на каждого пользователя.'''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.flushed = time.monotonic()
+
+    def add(self, user_id, draft):
+        with self.lock:
+            self.pending[user_id] = draft
+
+    def discard(self, user_id):
+        '''Убирает черновик из буфера; True, если он там был.'''
+        with self.lock:
+            return self.pending.pop(user_id, None) is not None
+
+    def take(self, now=None):
+        '''Забирает все черновики из буфера.'''
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            batch, self.pending = self.pending, {}
+            self.flushed = now
+            return batch
+
+    def take_due(self, now=None):
+        '''Забирает черновики, если пачку пора записать, иначе None.'''
+        now = time.monotonic() if now is None else now
+        if not self.pending or (len(self.pending) < FLUSH_SIZE
+                                and now - self.flushed < FLUSH_INTERVAL):
+            return None
+        return self.take(now)
+
+
+buffer = DraftBuffer()
+
+
+def write(batch):
+    '''Записывает пачку черновиков: чтение отметок, DELETE и INSERT.'''
+    if not batch:
+        return
+    with transaction.atomic():
+        # черновик, опубликованный в другом процессе, не возвращаем
+        discarded = dict(
+            Draft.objects.select_for_update()
+            .filter(user_id__in=batch, discarded__isnull=False)
+            .values_list('user_id', 'discarded')
+        )
+        batch = {
+            user_id: draft for user_id, draft in batch.items()
+            if user_id not in discarded
+            or discarded[user_id] < draft['updated']
+        }
+        if not batch:
+            return
+        Draft.objects.filter(user_id__in=batch).delete()
+        Draft.objects.bulk_create(
+            Draft(user_id=user_id, **draft)
+            for user_id, draft in batch.items()
+        )
+
+
+def flush(now=None):
+    '''Записывает буфер, если с прошлой записи прошло FLUSH_INTERVAL.'''
+    write(buffer.take_due(now))
+
+
+def autosave(user, text, group_id=None, now=None):
+    draft = {'text': text, 'group_id': group_id, 'updated': timezone.now()}
+    namespace('posts').set(_key(user.pk), draft, DRAFT_TTL)
+    buffer.add(user.pk, draft)
+    flush(now)
+    return draft
+
+
+def load(user):
+    '''Черновик пользователя или None.'''
+    cached = namespace('posts').get(_key(user.pk))
+    stored = Draft.objects.filter(user=user).values(
+        'text', 'group_id', 'updated', 'discarded').first()
+    if stored is None:
+        return cached
+    discarded = stored.pop('discarded')
+    if cached is not None and cached['updated'] >= stored['updated']:
+        # копия в кэше другого процесса могла пережить публикацию
+        if discarded is None or cached['updated'] > discarded:
+            return cached
+    return None if discarded else stored
+
+
+def discard(user):
+    '''Отмечает черновик опубликованным, если черновик есть.'''
+    buffered = buffer.discard(user.pk)
+    cache = namespace('posts')
+    cached = cache.get(_key(user.pk)) is not None
+    if cached:
+        cache.delete(_key(user.pk))
+    now = timezone.now()
+    mark = {'text': '', 'group_id': None, 'updated': now, 'discarded': now}
+    if not Draft.objects.filter(user=user).update(**mark) and (
+            buffered or cached):
+        # черновик еще не записан в базу: отметка не даст записать его
+        Draft.objects.bulk_create(
+            [Draft(user=user, **mark)], ignore_conflicts=True)
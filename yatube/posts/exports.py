@@ -0,0 +1,75 @@
+'''Потоковая выгрузка постов в CSV, JSON Lines и Atom.
+
+Генераторы получают итератор по FeedRow и отдают ответ по строке, так
+что память не зависит от числа выгружаемых постов.
+'''
+import csv
+import json
+from xml.sax.saxutils import escape
+
+from django.urls import reverse
+from django.utils import timezone
+
+EXPORT_CHUNK_SIZE = 500
+FIELDS = ('id', 'pub_date', 'author', 'group', 'text', 'image')
+
+
+def _values(row):
+    return (
+        row.id,
+        row.pub_date.isoformat(),
+        row.author.username,
+        row.group.slug if row.group else '',
+        row.text,
+        row.image,
+    )
+
+
+class _Echo:
+    '''Псевдофайл для csv.writer: возвращает строку вместо записи.'''
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(request, rows, title):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(FIELDS)
+    for row in rows:
+        yield writer.writerow(_values(row))
+
+
+def jsonl_lines(request, rows, title):
+    for row in rows:
+        yield json.dumps(
+            dict(zip(FIELDS, _values(row))), ensure_ascii=False) + '\n'
+
+
+def atom_lines(request, rows, title):
+    updated = timezone.now().isoformat()
+    yield '<?xml version="1.0" encoding="utf-8"?>\n'
+    yield '<feed xmlns="http://www.w3.org/2005/Atom">\n'
+    yield f'<title>{escape(title)}</title>\n'
+    yield f'<id>{escape(request.build_absolute_uri())}</id>\n'
+    yield f'<updated>{updated}</updated>\n'
+    for row in rows:
+        link = request.build_absolute_uri(
+            reverse('posts:post_detail', args=[row.id]))
+        yield (
+            '<entry>'
+            f'<title>{escape(row.text[:30])}</title>'
+            f'<link href="{escape(link)}"/>'
+            f'<id>{escape(link)}</id>'
+            f'<updated>{row.pub_date.isoformat()}</updated>'
+            f'<author><name>{escape(row.author.username)}</name></author>'
+            f'<content type="text">{escape(row.text)}</content>'
+            '</entry>\n'
+        )
+    yield '</feed>\n'
+
+
+EXPORTERS = {
+    'csv': ('text/csv; charset=utf-8', csv_lines),
+    'jsonl': ('application/x-ndjson; charset=utf-8', jsonl_lines),
+    'atom': ('application/atom+xml; charset=utf-8', atom_lines),
+}
@@ -0,0 +1,63 @@
+'''Облегченные строки ленты.
+
+Вместо экземпляров Post, User и Group лента строится из кортежей
+values_list, обернутых в классы со __slots__. Атрибуты повторяют ровно
+то, что используют шаблоны ленты, поэтому post_list.html работает без
+изменений.
+'''
+from django.db.models.query import ValuesListIterable
+
+
+class FeedAuthor:
+    __slots__ = ('username', 'first_name', 'last_name')
+
+    def __init__(self, username, first_name, last_name):
+        self.username = username
+        self.first_name = first_name
+        self.last_name = last_name
+
+    def __str__(self):
+        return self.username
+
+    def get_full_name(self):
+        return f'{self.first_name} {self.last_name}'.strip()
+
+
+class FeedGroup:
+    __slots__ = ('title', 'slug')
+
+    def __init__(self, title, slug):
+        self.title = title
+        self.slug = slug
+
+    def __str__(self):
+        return self.title
+
+
+class FeedRow:
+    __slots__ = ('id', 'text', 'pub_date', 'image', 'author', 'group')
+
+    FIELDS = (
+        'id', 'text', 'pub_date', 'image',
+        'author__username', 'author__first_name', 'author__last_name',
+        'group__title', 'group__slug',
+    )
+
+    def __init__(self, row):
+        (self.id, self.text, self.pub_date, self.image,
+         username, first_name, last_name, title, slug) = row
+        self.author = FeedAuthor(username, first_name, last_name)
+        self.group = FeedGroup(title, slug) if slug is not None else None
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __repr__(self):
+        return f'<FeedRow: {self.id}>'
+
+
+class FeedRowIterable(ValuesListIterable):
+    def __iter__(self):
+        for row in super().__iter__():
+            yield FeedRow(row)
@@ -0,0 +1,152 @@
+'''Atom- и RSS-ленты главной страницы, групп и авторов.
+
+Тело ленты собирается один раз на схему и хост (в нем абсолютные
+ссылки) и хранится в кэше вместе с ETag и временем сборки. Сигналы
+сбрасывают ленту при создании, правке или удалении поста, увеличивая
+версию ее области: ключи всех хостов устаревают разом. Повторные опросы
+с If-None-Match / If-Modified-Since получают 304 без обращения к базе.
+'''
+import hashlib
+import time
+
+from core.cache import get_or_refresh, namespace
+from django.contrib.syndication.views import Feed
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.http import http_date
+
+from . import archive
+
+FEED_SIZE = 20
+FEED_TTL = 60 * 60 * 24
+FEED_TYPES = {
+    'atom': Atom1Feed,
+    'rss': Rss201rev2Feed,
+}
+
+
+class PostsFeed(Feed):
+    title = 'Yatube: последние обновления'
+    description = 'Новые посты на сайте'
+
+    def __init__(self, feed_type):
+        self.feed_type = feed_type
+
+    def link(self, obj=None):
+        return reverse('posts:index')
+
+    def posts(self, obj):
+        return archive.feed('index')
+
+    def items(self, obj=None):
+        return list(self.posts(obj)[:FEED_SIZE])
+
+    def item_title(self, item):
+        return item.text[:30]
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=[item.id])
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+
+class GroupPostsFeed(PostsFeed):
+    def get_object(self, request, group):
+        return group
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def link(self, group):
+        return reverse('posts:group_list', args=[group.slug])
+
+    def posts(self, group):
+        return archive.feed(f'group:{group.pk}', group=group)
+
+
+class AuthorPostsFeed(PostsFeed):
+    def get_object(self, request, author):
+        return author
+
+    def title(self, author):
+        return f'Yatube: посты {author.username}'
+
+    def link(self, author):
+        return reverse('posts:profile', args=[author.username])
+
+    def posts(self, author):
+        return archive.feed(f'author:{author.pk}', author=author)
+
+
+def _version_key(scope):
+    return f'feed:{scope}:version'
+
+
+def _new_version():
+    # ключ версии мог быть вытеснен: новая версия не повторяет старые
+    return int(time.time() * 1000)
+
+
+def _version(cache, scope):
+    version = cache.get(_version_key(scope))
+    if version is None:
+        cache.add(_version_key(scope), _new_version(), None)
+        version = cache.get(_version_key(scope))
+    return version
+
+
+def version(scope):
+    '''Версия области; растет при каждом сбросе ее лент.'''
+    return _version(namespace('posts'), scope)
+
+
+def _key(request, scope, fmt, version):
+    origin = f'{request.scheme}://{request.get_host()}'
+    return f'feed:{scope}:{fmt}:{version}:{origin}'
+
+
+def invalidate(*scopes):
+    '''Сбрасывает ленты scopes и закэшированное число их архивных постов.'''
+    cache = namespace('posts')
+    for scope in scopes:
+        try:
+            cache.incr(_version_key(scope))
+        except ValueError:
+            cache.add(_version_key(scope), _new_version(), None)
+
+
+def response(request, feed_class, scope, fmt, obj=None):
+    '''Отдает ленту из кэша, собирая ее при промахе.'''
+    if fmt not in FEED_TYPES:
+        raise Http404
+
+    def build():
+        built = feed_class(FEED_TYPES[fmt])(request, obj)
+        return {
+            'body': built.content,
+            'content_type': built['Content-Type'],
+            'etag': '"%s"' % hashlib.md5(built.content).hexdigest(),
+            'last_modified': int(timezone.now().timestamp()),
+        }
+
+    cache = namespace('posts')
+    key = _key(request, scope, fmt, _version(cache, scope))
+    cached = get_or_refresh(cache, key, build, FEED_TTL)
+    result = get_conditional_response(
+        request, etag=cached['etag'], last_modified=cached['last_modified'])
+    if result is None:
+        result = HttpResponse(
+            cached['body'], content_type=cached['content_type'])
+    result['ETag'] = cached['etag']
+    result['Last-Modified'] = http_date(cached['last_modified'])
+    return result
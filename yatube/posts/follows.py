@@ -0,0 +1,67 @@
+'''Операции с подписками.
+
+Вставки идемпотентны и выполняются одним запросом (INSERT ... ON CONFLICT
+DO NOTHING), удаление всегда ограничено подписчиком.
+'''
+from core.pagination import cursor_paginator
+
+from . import recommendations
+from .models import Follow
+
+FOLLOW_PER_PAGE = 20
+
+
+def _pk(obj):
+    return getattr(obj, 'pk', obj)
+
+
+def follow_many(user, authors):
+    '''Подписывает user на всех authors (объекты User или их id).'''
+    user_id = _pk(user)
+    author_ids = {_pk(author) for author in authors} - {user_id}
+    Follow.objects.bulk_create(
+        [Follow(user_id=user_id, author_id=pk) for pk in author_ids],
+        ignore_conflicts=True,
+    )
+    recommendations.mark_stale([user_id])
+    return author_ids
+
+
+def unfollow_many(user, authors):
+    '''Отписывает user от authors, не трогая чужие подписки.'''
+    author_ids = {_pk(author) for author in authors}
+    deleted, _ = Follow.objects.filter(
+        user=user, author_id__in=author_ids).delete()
+    if deleted:
+        recommendations.mark_stale([_pk(user)])
+    return deleted
+
+
+def follow(user, author):
+    return follow_many(user, [author])
+
+
+def unfollow(user, author):
+    return unfollow_many(user, [author])
+
+
+def is_following(user, author):
+    if not user.is_authenticated:
+        return False
+    return Follow.objects.filter(user=user, author=author).exists()
+
+
+def followers(request, author):
+    '''Страница подписчиков author, новые подписки первыми.'''
+    queryset = Follow.objects.filter(author=author).select_related('user')
+    page = cursor_paginator(request, queryset, FOLLOW_PER_PAGE)
+    page.object_list = [follow.user for follow in page.object_list]
+    return page
+
+
+def following(request, user):
+    '''Страница авторов, на которых подписан user.'''
+    queryset = Follow.objects.filter(user=user).select_related('author')
+    page = cursor_paginator(request, queryset, FOLLOW_PER_PAGE)
+    page.object_list = [follow.author for follow in page.object_list]
+    return page
@@ -1,5 +1,8 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
+from django.utils import timezone
 
+from . import images
 from .models import Comment, Post
 
 
@@ -8,6 +11,34 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        # при редактировании без новой картинки здесь уже сохраненный файл
+        if isinstance(image, UploadedFile):
+            image, size = images.normalize(image)
+            self.instance.image_width, self.instance.image_height = size
+        elif not image:
+            self.instance.image_width = self.instance.image_height = None
+        return image
+
+
+class ScheduleForm(forms.Form):
+    '''Время отложенной публикации; пустое - опубликовать сразу.'''
+    publish_at = forms.DateTimeField(
+        label='Опубликовать',
+        required=False,
+        input_formats=['%Y-%m-%dT%H:%M', '%Y-%m-%d %H:%M'],
+        widget=forms.DateTimeInput(
+            attrs={'type': 'datetime-local'}, format='%Y-%m-%dT%H:%M'),
+        help_text='Оставьте пустым, чтобы опубликовать сразу',
+    )
+
+    def clean_publish_at(self):
+        publish_at = self.cleaned_data['publish_at']
+        if publish_at and publish_at <= timezone.now():
+            raise forms.ValidationError('Время публикации уже прошло')
+        return publish_at
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,55 @@
+'''Статистика групп для каталога.
+
+Счетчики горячих и архивных постов считаются агрегирующими запросами
+по каждой таблице и складываются. Результат кэшируется; кэш
+сбрасывается сигналами, когда пост появляется, удаляется или
+переходит в другую группу, а массовые действия админки (moderation.py)
+сбрасывают его сами.
+'''
+from collections import Counter
+
+from core.cache import get_or_refresh, namespace
+from django.db.models import Count, Max
+
+from .models import ArchivedPost, Group, Post
+
+CACHE_KEY = 'group_stats'
+CACHE_TTL = 60 * 60
+
+
+def _query():
+    groups = list(
+        Group.objects.annotate(
+            posts_count=Count('posts'),
+            last_post=Max('posts__pub_date'),
+        ).order_by('title')
+    )
+    archived = {
+        row['group']: row for row in
+        ArchivedPost.objects.filter(group__isnull=False).values('group')
+        .annotate(count=Count('pk'), last=Max('pub_date')).order_by()
+    }
+    # UNION убирает повторы пар, остается число разных авторов группы
+    authors = Counter(
+        group for group, _ in
+        Post.objects.filter(group__isnull=False).order_by()
+        .values_list('group', 'author')
+        .union(
+            ArchivedPost.objects.filter(group__isnull=False).order_by()
+            .values_list('group', 'author'))
+    )
+    for group in groups:
+        row = archived.get(group.pk)
+        if row:
+            group.posts_count += row['count']
+            group.last_post = group.last_post or row['last']
+        group.authors_count = authors[group.pk]
+    return groups
+
+
+def directory():
+    return get_or_refresh(namespace('posts'), CACHE_KEY, _query, CACHE_TTL)
+
+
+def invalidate():
+    namespace('posts').delete(CACHE_KEY)
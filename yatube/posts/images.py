@@ -0,0 +1,47 @@
+'''Обработка загружаемых картинок.
+
+Картинка уменьшается до MAX_IMAGE_SIDE по большей стороне, поворачивается
+по EXIF-ориентации и перекодируется без метаданных. Результат копится во
+временном файле, который уходит на диск, если не помещается в
+FILE_UPLOAD_MAX_MEMORY_SIZE, и сохраняется хранилищем по частям.
+Размеры сохраняются в Post.image_width/image_height, поэтому дальше
+файл для их определения открывать не нужно.
+'''
+import os
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.files import File
+
+MAX_IMAGE_SIDE = 1920
+JPEG_QUALITY = 85
+# форматы, которые перекодируем; анимированный GIF сохраняем как есть
+REENCODE_FORMATS = {
+    'JPEG': {'quality': JPEG_QUALITY, 'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': JPEG_QUALITY},
+}
+
+
+def normalize(upload):
+    '''Возвращает обработанную копию загрузки и ее размеры.'''
+    # Pillow нужен только при загрузке, не при запуске процесса
+    from PIL import Image, ImageOps
+
+    upload.seek(0)
+    with Image.open(upload) as image:
+        image_format = image.format
+        if image_format not in REENCODE_FORMATS:
+            upload.seek(0)
+            return upload, image.size
+        # JPEG декодируется сразу в уменьшенном масштабе
+        image.draft('RGB', (MAX_IMAGE_SIDE, MAX_IMAGE_SIDE))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((MAX_IMAGE_SIDE, MAX_IMAGE_SIDE), Image.LANCZOS)
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        buffer = SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+        image.save(buffer, image_format, **REENCODE_FORMATS[image_format])
+    buffer.seek(0)
+    return File(buffer, name=os.path.basename(upload.name)), image.size
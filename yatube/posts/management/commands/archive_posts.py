@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import archive
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые посты с комментариями в архив'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.POSTS_ARCHIVE_AFTER_DAYS,
+            help='Переносить посты старше стольких дней',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=archive.BATCH_SIZE,
+            help='Сколько постов переносится в одной транзакции',
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help='Пауза между пачками в секундах',
+        )
+
+    def handle(self, *args, **options):
+        moved = archive.archive(
+            days=options['days'],
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+        )
+        self.stdout.write(f'Перенесено в архив постов: {moved}')
@@ -0,0 +1,58 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from posts import drafts
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Считает запросы к базе при автосохранении черновиков'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument(
+            '--saves', type=int, default=300,
+            help='Автосохранений за сессию на пользователя',
+        )
+        parser.add_argument(
+            '--every', type=float, default=2.0,
+            help='Секунд между автосохранениями одного пользователя',
+        )
+
+    def handle(self, *args, **options):
+        statements = []
+
+        def count(execute, sql, params, many, context):
+            statements.append(sql)
+            return execute(sql, params, many, context)
+
+        try:
+            with transaction.atomic():
+                users = [
+                    User.objects.create(username=f'bench_drafts_{i}')
+                    for i in range(options['users'])
+                ]
+                drafts.buffer.take(now=0)
+                with connection.execute_wrapper(count):
+                    text = ''
+                    for step in range(options['saves']):
+                        text += 'слово '
+                        now = step * options['every']
+                        for user in users:
+                            drafts.autosave(user, text, now=now)
+                    drafts.write(drafts.buffer.take())
+                raise Rollback
+        except Rollback:
+            pass
+        saves = options['users'] * options['saves']
+        self.stdout.write(
+            f'Автосохранений: {saves}; UPDATE на каждое: {saves} запросов')
+        self.stdout.write(
+            f'Через буфер: {len(statements)} запросов '
+            f'({len(statements) / options["users"]:.1f} на сессию)')
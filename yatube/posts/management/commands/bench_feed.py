@@ -0,0 +1,47 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+
+
+def measure(build, repeat):
+    '''Лучшее время и пиковая память построения строк ленты.
+
+    Память меряется отдельным прогоном: tracemalloc сильно замедляет код.
+    '''
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        build()
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    build()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает FeedRow и экземпляры моделей на ленте постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        variants = {
+            'select_related': lambda: list(
+                Post.objects.select_related('author', 'group')[:rows]),
+            'feed_rows': lambda: list(Post.objects.feed_rows()[:rows]),
+        }
+        count = min(rows, Post.objects.count())
+        self.stdout.write(f'Строк: {count}, повторов: {repeat}')
+        for name, build in variants.items():
+            seconds, peak = measure(build, repeat)
+            self.stdout.write(
+                f'{name:>16}: {seconds * 1000:8.2f} мс, '
+                f'пик памяти {peak / 1024:8.1f} КиБ'
+            )
@@ -0,0 +1,70 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import revisions
+
+WORDS = (
+    'велосипед дорога перевал карта трек река озеро лес подъем спуск '
+    'ночевка палатка маршрут ветер дождь солнце город деревня мост поезд'
+).split()
+
+
+def sentence(rand):
+    words = rand.choices(WORDS, k=rand.randint(6, 14))
+    return ' '.join(words).capitalize() + '.'
+
+
+def edits(rand, sentences, count):
+    '''Тексты поста после каждой правки: меняется одно предложение.'''
+    text = [sentence(rand) for _ in range(sentences)]
+    yield ' '.join(text)
+    for _ in range(count):
+        action = rand.random()
+        position = rand.randrange(len(text))
+        if action < 0.6:
+            text[position] = sentence(rand)
+        elif action < 0.8 or len(text) < 2:
+            text.insert(position, sentence(rand))
+        else:
+            del text[position]
+        yield ' '.join(text)
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает историю правок в разницах и в полных копиях'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sentences', type=int, default=30)
+        parser.add_argument('--edits', type=int, default=100)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        texts = list(edits(random.Random(options['seed']),
+                           options['sentences'], options['edits']))
+        # записи в том виде, в каком их сохраняет revisions.record
+        rows = []
+        for number, (old, new) in enumerate(zip(texts, texts[1:])):
+            rows.append(revisions.encode(number, new, old))
+        full = sum(len(old.encode()) for old in texts[:-1])
+        compact = sum(len(data.encode()) for _, data in rows)
+        snapshots = sum(snapshot for snapshot, _ in rows)
+        self.stdout.write(
+            f'Правок: {len(rows)}, снимков: {snapshots}, '
+            f'текст {len(texts[-1].encode())} байт')
+        self.stdout.write(
+            f'Полные копии: {full} байт, разницы: {compact} байт '
+            f'({compact / full:.1%})')
+
+        # худший случай - версия сразу после снимка: до SNAPSHOT_EVERY
+        # записей поверх снимка или текущего текста
+        started = time.perf_counter()
+        for number in range(len(rows)):
+            chain = rows[number:revisions.snapshot_after(number) + 1]
+            assert revisions.rebuild(texts[-1], chain) == texts[number]
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'Восстановление: {elapsed / len(rows) * 1e6:.0f} мкс на версию, '
+            f'не больше {revisions.SNAPSHOT_EVERY} записей '
+            f'(у полной копии - одна)')
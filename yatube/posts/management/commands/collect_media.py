@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from posts import media_gc
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет картинки постов и миниатюры, на которые больше '
+        'никто не ссылается'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Обойти все хранилище, а не только очередь удаленных',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать, ничего не удаляя',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=media_gc.WORKERS,
+            help='Сколько потоков работают с файлами',
+        )
+
+    def handle(self, *args, **options):
+        collector = media_gc.Collector(
+            dry_run=options['dry_run'], workers=options['workers'])
+        report = collector.collect(full=options['full'])
+        self.stdout.write(
+            f'Проверено: {report.scanned}, удалено файлов: {report.deleted}, '
+            f'освобождено {report.freed} байт'
+            + (' (пробный запуск)' if options['dry_run'] else '')
+        )
+        self.stdout.write(
+            f'{report.elapsed:.2f} с, {report.rate:.0f} имен/с')
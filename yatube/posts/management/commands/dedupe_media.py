@@ -0,0 +1,76 @@
+import os
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.storage import content_hash, hashed_name
+from posts.models import ArchivedPost, Post, ScheduledPost
+
+BATCH_SIZE = 500
+# модели, которые ссылаются на картинки из одного хранилища
+MODELS = (Post, ArchivedPost, ScheduledPost)
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит картинки постов в хранилище по хэшу содержимого '
+        'и удаляет дубликаты'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать, ничего не меняя',
+        )
+
+    def handle(self, *args, **options):
+        field = Post._meta.get_field('image')
+        storage = field.storage
+        dry_run = options['dry_run']
+        renamed = {}
+        sizes = {}
+        missing = 0
+        names = set()
+        for model in MODELS:
+            names.update(
+                model.objects.exclude(image='').order_by()
+                .values_list('image', flat=True).distinct().iterator())
+        for name in sorted(names):
+            if not storage.exists(name):
+                missing += 1
+                continue
+            # имя по хэшу строится от upload_to, а не от старого каталога
+            target = field.generate_filename(None, os.path.basename(name))
+            with storage.open(name) as content:
+                sizes[name] = content.size
+                if dry_run:
+                    new_name = hashed_name(target, content_hash(content))
+                else:
+                    new_name = storage.save(target, content)
+            renamed[name] = new_name
+        unique = {new: sizes[old] for old, new in renamed.items()}
+        before = sum(sizes.values())
+        after = sum(unique.values())
+        if not dry_run:
+            self.relink(renamed)
+            for old, new in renamed.items():
+                if old != new:
+                    storage.delete(old)
+        self.stdout.write(
+            f'Файлов: {len(renamed)}, уникальных: {len(unique)}, '
+            f'не найдено: {missing}'
+        )
+        self.stdout.write(
+            f'Было {before} байт, стало {after} байт, '
+            f'освобождено {before - after} байт'
+            + (' (пробный запуск)' if dry_run else '')
+        )
+
+    def relink(self, renamed):
+        '''Переписывает ссылки: UPDATE на имя и модель, транзакция на пачку.'''
+        changed = [(old, new) for old, new in renamed.items() if old != new]
+        for start in range(0, len(changed), BATCH_SIZE):
+            with transaction.atomic():
+                for old, new in changed[start:start + BATCH_SIZE]:
+                    for model in MODELS:
+                        model.objects.filter(image=old).update(image=new)
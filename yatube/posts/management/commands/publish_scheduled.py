@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts import scheduling
+
+
+class Command(BaseCommand):
+    help = 'Публикует отложенные посты, время которых наступило'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, просыпаясь к ближайшей публикации',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=scheduling.BATCH_SIZE,
+            help='Сколько постов публикуется одной пачкой',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            published = scheduling.publish_due(
+                batch_size=options['batch_size'])
+            if published:
+                self.stdout.write(f'Опубликовано постов: {published}')
+            if not options['loop']:
+                return
+            time.sleep(self.pause())
+
+    def pause(self):
+        '''Секунды до ближайшей публикации, но не больше POLL_INTERVAL.'''
+        due = scheduling.next_due()
+        if due is None:
+            return scheduling.POLL_INTERVAL
+        wait = (due - timezone.now()).total_seconds()
+        return min(max(wait, 0), scheduling.POLL_INTERVAL)
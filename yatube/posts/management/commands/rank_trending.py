@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинги популярных постов и групп'
+
+    def handle(self, *args, **options):
+        posts, groups = trending.recompute()
+        self.stdout.write(f'Постов в рейтинге: {posts}, групп: {groups}')
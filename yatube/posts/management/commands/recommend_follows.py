@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts import recommendations
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации авторов по графу подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересчитать всех пользователей, а не только измененных',
+        )
+        parser.add_argument(
+            '--top', type=int, default=recommendations.TOP_K,
+            help='Сколько рекомендаций хранить на пользователя',
+        )
+
+    def handle(self, *args, **options):
+        count = recommendations.refresh(
+            full=options['full'], top_k=options['top'])
+        self.stdout.write(f'Пересчитано пользователей: {count}')
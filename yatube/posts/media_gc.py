@@ -0,0 +1,232 @@
+'''Сборка осиротевших картинок постов и миниатюр sorl-thumbnail.
+
+Картинки хранятся по хэшу содержимого (см. core.storage) и могут
+разделяться несколькими постами, поэтому файл удаляется, только когда на
+него не ссылается ни один пост. Удаление поста и замена картинки ставят
+старое имя в очередь StaleImage (см. signals.py), и обычный запуск
+``collect_media`` проверяет только ее; файлы моложе GRACE_PERIOD
+остаются в очереди до следующего запуска. Полный проход обходит posts/,
+cache/ и ключи sorl-thumbnail потоково и сверяет имена с картинками
+постов, архива и отложенных постов пачками. Запросы к базе идут из
+основного потока, работа с файлами - в пуле потоков.
+'''
+import posixpath
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.utils import timezone
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from .models import ArchivedPost, Post, ScheduledPost, StaleImage
+
+BATCH_SIZE = 500
+WORKERS = 8
+# свежий файл может принадлежать посту, который еще не сохранен
+GRACE_PERIOD = timedelta(hours=1)
+IMAGES_DIR = 'posts'
+
+
+def mark_stale(names):
+    StaleImage.objects.bulk_create(
+        [StaleImage(name=name) for name in names if name],
+        ignore_conflicts=True,
+    )
+
+
+def walk(storage, path):
+    '''Имена файлов под path; каталоги читаются по одному.'''
+    if not storage.exists(path):
+        return
+    directories, files = storage.listdir(path)
+    for name in files:
+        yield posixpath.join(path, name)
+    for directory in directories:
+        yield from walk(storage, posixpath.join(path, directory))
+
+
+def batches(iterable, size=BATCH_SIZE):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def unreferenced(names):
+    '''Имена из пачки, на которые не ссылается ни один пост.'''
+    used = set()
+    for model in (Post, ArchivedPost, ScheduledPost):
+        used.update(
+            model.objects.filter(image__in=names).order_by()
+            .values_list('image', flat=True)
+        )
+    return [name for name in names if name not in used]
+
+
+def thumbnails(source, forget):
+    '''Имена миниатюр картинки; forget снимает их ключи в sorl.'''
+    kvstore = default.kvstore
+    names = []
+    for key in kvstore._get(source.key, identity='thumbnails') or []:
+        thumbnail = kvstore._get(key)
+        if thumbnail:
+            names.append(thumbnail.name)
+            if forget:
+                kvstore._delete(key)
+    if forget:
+        kvstore._delete(source.key, identity='thumbnails')
+        kvstore._delete(source.key)
+    return names
+
+
+def _size(storage, name):
+    '''Размер файла или None, если его уже нет.'''
+    try:
+        return storage.size(name)
+    except OSError:
+        return None
+
+
+def _remove(storage, name):
+    size = _size(storage, name)
+    if size is not None:
+        storage.delete(name)
+    return size
+
+
+class Report:
+    def __init__(self):
+        self.scanned = 0
+        self.deleted = 0
+        self.freed = 0
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self):
+        return self.scanned / max(self.elapsed, 1e-6)
+
+
+class Collector:
+    def __init__(self, dry_run=False, workers=WORKERS):
+        self.storage = Post._meta.get_field('image').storage
+        self.thumbnail_storage = default.storage
+        self.dry_run = dry_run
+        self.workers = workers
+        self.report = Report()
+
+    def collect(self, full=False):
+        '''Удаляет осиротевшие файлы и возвращает Report.'''
+        names = list(StaleImage.objects.values_list('name', flat=True))
+        if not self.dry_run:
+            # Очередь снимается до проверки: имена, попавшие в нее во
+            # время сборки, проверит следующий запуск.
+            for batch in batches(names):
+                StaleImage.objects.filter(name__in=batch).delete()
+        with ThreadPoolExecutor(self.workers) as self.executor:
+            if full:
+                self.collect_images()
+                self.collect_kvstore()
+                self.collect_thumbnails()
+            else:
+                for batch in batches(names):
+                    self.report.scanned += len(batch)
+                    fresh = self.fresh(self.storage, batch)
+                    if fresh and not self.dry_run:
+                        mark_stale(fresh)
+                    self.delete_images(
+                        [name for name in batch if name not in fresh])
+        return self.report
+
+    def collect_images(self):
+        for batch in batches(walk(self.storage, IMAGES_DIR)):
+            self.report.scanned += len(batch)
+            self.delete_images(self.expired(self.storage, batch))
+
+    def collect_kvstore(self):
+        '''Снимает ключи sorl картинок, файлов которых уже нет у постов.'''
+        kvstore = default.kvstore
+        sources = (
+            kvstore._get(key) for key in kvstore._find_keys(identity='image'))
+        names = (
+            source.name for source in sources
+            if source and source.name.startswith(IMAGES_DIR + '/')
+        )
+        for batch in batches(names):
+            self.report.scanned += len(batch)
+            self.delete_images(batch)
+
+    def collect_thumbnails(self):
+        '''Удаляет файлы миниатюр, о которых не знает sorl.'''
+        kvstore = default.kvstore
+        known = set()
+        for key in kvstore._find_keys(identity='thumbnails'):
+            source = kvstore._get(key)
+            if source:
+                known.update(thumbnails(source, forget=False))
+        prefix = thumbnail_settings.THUMBNAIL_PREFIX.rstrip('/')
+        for batch in batches(walk(self.thumbnail_storage, prefix)):
+            self.report.scanned += len(batch)
+            stale = [name for name in batch if name not in known]
+            self.remove([
+                (self.thumbnail_storage, name)
+                for name in self.expired(self.thumbnail_storage, stale)
+            ])
+
+    def modified(self, storage, names):
+        '''Пары (имя, время изменения или None, если файла нет).'''
+        def modified_time(name):
+            try:
+                return storage.get_modified_time(name)
+            except OSError:
+                return None
+
+        return zip(names, self.executor.map(modified_time, names))
+
+    def expired(self, storage, names):
+        '''Имена файлов старше GRACE_PERIOD.'''
+        deadline = timezone.now() - GRACE_PERIOD
+        return [
+            name for name, modified in self.modified(storage, names)
+            if modified is not None and modified < deadline
+        ]
+
+    def fresh(self, storage, names):
+        '''Имена файлов моложе GRACE_PERIOD.'''
+        deadline = timezone.now() - GRACE_PERIOD
+        return {
+            name for name, modified in self.modified(storage, names)
+            if modified is not None and modified >= deadline
+        }
+
+    def delete_images(self, names):
+        files = []
+        for name in unreferenced(names):
+            files.append((self.storage, name))
+            # ленты передают sorl имя строкой, и оно попадает в ключи
+            # с хранилищем по умолчанию, а страница поста - с хранилищем поля
+            for source in (ImageFile(name, self.storage), ImageFile(name)):
+                files.extend(
+                    (self.thumbnail_storage, thumbnail)
+                    for thumbnail in thumbnails(
+                        source, forget=not self.dry_run)
+                )
+        self.remove(files)
+
+    def remove(self, files):
+        if not files:
+            return
+        action = _size if self.dry_run else _remove
+        for size in self.executor.map(action, *zip(*files)):
+            if size is not None:
+                self.report.deleted += 1
+                self.report.freed += size
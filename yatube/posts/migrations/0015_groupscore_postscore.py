@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_auto_20261019_0728'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupScore',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='posts.Group')),
+                ('score', models.FloatField(default=0)),
+                ('updated', models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PostScore',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='posts.Post')),
+                ('score', models.FloatField(default=0)),
+                ('updated', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
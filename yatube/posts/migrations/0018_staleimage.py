@@ -0,0 +1,19 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_auto_20261019_0741'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StaleImage',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False)),
+            ],
+        ),
+    ]
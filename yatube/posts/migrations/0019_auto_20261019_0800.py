@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_staleimage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='pub_date',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_auto_20261019_0800'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['created'], name='posts_comme_created_aa6d8f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['created'], name='posts_follo_created_7aadc6_idx'),
+        ),
+    ]
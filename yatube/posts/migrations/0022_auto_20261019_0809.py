@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_archivedcomment_archivedpost'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='revision',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='PostRevision',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, null=True, verbose_name='Дата создания')),
+                ('number', models.PositiveIntegerField()),
+                ('snapshot', models.BooleanField(default=False)),
+                ('data', models.TextField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='posts.Post')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='postrevision',
+            constraint=models.UniqueConstraint(fields=('post', 'number'), name='unique_post_revision'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0022_auto_20261019_0809'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Draft',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('text', models.TextField(blank=True)),
+                ('group_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('updated', models.DateTimeField()),
+            ],
+        ),
+    ]
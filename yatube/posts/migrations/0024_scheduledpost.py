@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:15
+
+import core.storage
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0023_draft'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledPost',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, null=True, verbose_name='Дата создания')),
+                ('text', models.TextField(verbose_name='Текст поста')),
+                ('image', models.ImageField(blank=True, storage=core.storage.ContentAddressedStorage(), upload_to='posts/', verbose_name='Картинка')),
+                ('image_width', models.PositiveIntegerField(blank=True, null=True)),
+                ('image_height', models.PositiveIntegerField(blank=True, null=True)),
+                ('publish_at', models.DateTimeField(db_index=True, verbose_name='Опубликовать')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scheduled_posts', to=settings.AUTH_USER_MODEL)),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='posts.Group')),
+            ],
+            options={
+                'ordering': ('publish_at',),
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0024_scheduledpost'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='draft',
+            name='discarded',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,6 +1,10 @@
 from core.models import CreatedModel
+from core.storage import ContentAddressedStorage
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+
+from .feed import FeedRow, FeedRowIterable
 
 User = get_user_model()
 
@@ -14,12 +18,21 @@ class Group(CreatedModel):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def feed_rows(self):
+        '''Лента в виде FeedRow вместо экземпляров моделей.'''
+        queryset = self.values_list(*FeedRow.FIELDS)
+        queryset._iterable_class = FeedRowIterable
+        return queryset
+
+
 class Post(CreatedModel):
     text = models.TextField(
         'Текст поста',
         help_text='Текст нового поста',
     )
-    pub_date = models.DateTimeField(auto_now_add=True)
+    # индекс нужен ленте (сортировка) и date_hierarchy в админке
+    pub_date = models.DateTimeField(auto_now_add=True, db_index=True)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -39,8 +52,16 @@ class Post(CreatedModel):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True
     )
+    # размеры заполняет PostForm при обработке загрузки
+    image_width = models.PositiveIntegerField(blank=True, null=True)
+    image_height = models.PositiveIntegerField(blank=True, null=True)
+    # номер текущей версии текста, он же число сохраненных правок
+    revision = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
@@ -50,6 +71,45 @@ class Post(CreatedModel):
     def __str__(self) -> str:
         return self.text[:15]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # запоминаем группу, картинку и текст, чтобы сигналы заметили
+        # перенос поста, замену картинки и правку текста
+        instance._loaded_group_id = instance.__dict__.get('group_id')
+        instance._loaded_image = instance.__dict__.get('image')
+        instance._loaded_text = instance.__dict__.get('text')
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self.edited_text() is None:
+            return super().save(*args, **kwargs)
+        # Правки одного поста идут по очереди: пустой UPDATE блокирует
+        # строку до конца транзакции, а номер версии и прежний текст
+        # берутся из базы, а не из загруженного ранее объекта.
+        with transaction.atomic():
+            Post.objects.filter(pk=self.pk).update(revision=F('revision'))
+            self._loaded_text, self.revision = Post.objects.filter(
+                pk=self.pk).values_list('text', 'revision').get()
+            return super().save(*args, **kwargs)
+
+    def group_changed(self):
+        return getattr(self, '_loaded_group_id', None) != self.group_id
+
+    def edited_text(self):
+        '''Прежний текст, если правка его изменила.'''
+        loaded = getattr(self, '_loaded_text', None)
+        if loaded is not None and loaded != self.text:
+            return loaded
+        return None
+
+    def replaced_image(self):
+        '''Имя картинки, которую правка заменила или убрала.'''
+        loaded = getattr(self, '_loaded_image', None)
+        if loaded and loaded != self.image.name:
+            return loaded
+        return None
+
 
 class Comment(CreatedModel):
     post = models.ForeignKey(
@@ -71,6 +131,10 @@ class Comment(CreatedModel):
         help_text='Текст нового комментария',
     )
 
+    class Meta:
+        # фильтр по дате в админке
+        indexes = [models.Index(fields=['created'])]
+
 
 class Follow(CreatedModel):
     user = models.ForeignKey(
@@ -85,7 +149,197 @@ class Follow(CreatedModel):
     )
 
     class Meta:
+        indexes = [models.Index(fields=['created'])]
         constraints = [
             models.UniqueConstraint(fields=['user', 'author'],
                                     name='unique_following')
         ]
+
+
+class Recommendation(CreatedModel):
+    '''Автор, рекомендованный пользователю фоновым расчетом.'''
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    score = models.FloatField(default=0)
+
+    class Meta:
+        ordering = ('-score',)
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='unique_recommendation')
+        ]
+
+
+class StaleRecommendation(models.Model):
+    '''Пользователь, чьи подписки изменились после последнего расчета.'''
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+',
+    )
+
+
+class StaleImage(models.Model):
+    '''Картинка, которая могла остаться без постов.'''
+    name = models.CharField(max_length=100, primary_key=True)
+
+
+class PostScore(models.Model):
+    '''Затухающий во времени рейтинг поста.
+
+    score хранится на момент updated; к текущему моменту он приводится
+    умножением на 0.5 ** (возраст / период полураспада).
+    '''
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+',
+    )
+    score = models.FloatField(default=0)
+    updated = models.DateTimeField(db_index=True)
+
+
+class GroupScore(models.Model):
+    '''Затухающий во времени рейтинг группы.'''
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+',
+    )
+    score = models.FloatField(default=0)
+    updated = models.DateTimeField(db_index=True)
+
+
+class ArchivedPost(models.Model):
+    '''Пост старше POSTS_ARCHIVE_AFTER_DAYS, перенесенный из Post.
+
+    id и даты сохраняются, поэтому адрес поста не меняется; архив только
+    читается - лента переходит в него после последнего горячего поста.
+    '''
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст поста')
+    pub_date = models.DateTimeField(db_index=True)
+    created = models.DateTimeField(blank=True, null=True)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+    )
+    group = models.ForeignKey(
+        Group,
+        related_name='archived_posts',
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+    )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        storage=ContentAddressedStorage(),
+        blank=True
+    )
+    image_width = models.PositiveIntegerField(blank=True, null=True)
+    image_height = models.PositiveIntegerField(blank=True, null=True)
+
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('-pub_date',)
+
+    def __str__(self) -> str:
+        return self.text[:15]
+
+
+class ArchivedComment(models.Model):
+    '''Комментарий архивного поста.'''
+    id = models.IntegerField(primary_key=True)
+    created = models.DateTimeField(blank=True, null=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        related_name='comments',
+        on_delete=models.CASCADE,
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+    )
+    text = models.TextField('Текст комментария')
+
+
+class PostRevision(CreatedModel):
+    '''Прежняя версия текста поста (см. revisions.py).'''
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='revisions',
+    )
+    number = models.PositiveIntegerField()
+    # True - data содержит весь текст, иначе разницу с версией number + 1
+    snapshot = models.BooleanField(default=False)
+    data = models.TextField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'number'],
+                                    name='unique_post_revision')
+        ]
+
+
+class Draft(models.Model):
+    '''Черновик нового поста; пишется в базу пачками (см. drafts.py).'''
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+',
+    )
+    text = models.TextField(blank=True)
+    group_id = models.PositiveIntegerField(blank=True, null=True)
+    updated = models.DateTimeField()
+    # время публикации; старые правки из буферов процессов не пишутся
+    discarded = models.DateTimeField(blank=True, null=True)
+
+
+class ScheduledPost(CreatedModel):
+    '''Пост, который scheduling.publish_due опубликует в publish_at.
+
+    До публикации пост живет отдельно от Post, поэтому лентам не нужно
+    условие pub_date <= now().
+    '''
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='scheduled_posts',
+    )
+    text = models.TextField('Текст поста')
+    group = models.ForeignKey(
+        Group,
+        related_name='+',
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+    )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        storage=ContentAddressedStorage(),
+        blank=True
+    )
+    image_width = models.PositiveIntegerField(blank=True, null=True)
+    image_height = models.PositiveIntegerField(blank=True, null=True)
+    publish_at = models.DateTimeField('Опубликовать', db_index=True)
+
+    class Meta:
+        ordering = ('publish_at',)
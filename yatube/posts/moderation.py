@@ -0,0 +1,79 @@
+'''Массовые операции над постами, комментариями и подписками для админки.
+
+Операции выполняются запросами по множеству, без загрузки объектов,
+поэтому сигналы моделей не срабатывают: кэши статистики и лент, а
+также очередь картинок на удаление обновляются здесь явно.
+'''
+from django.db import models, transaction
+from django.db.models.deletion import get_candidate_relations_to_delete
+
+from . import feeds, group_stats, media_gc, recommendations, trending
+from .models import Comment, Follow, Post
+
+
+def _group_scopes(group_ids):
+    return [f'group:{pk}' for pk in group_ids if pk]
+
+
+def raw_delete(posts):
+    '''Удаляет посты и зависимые записи, не загружая объекты.
+
+    Сигналы не срабатывают: кэши и картинки остаются на вызывающем.
+    '''
+    # включая скрытые связи вроде PostScore с related_name='+'
+    for relation in get_candidate_relations_to_delete(Post._meta):
+        related = relation.related_model._base_manager.filter(
+            **{f'{relation.field.name}__in': posts})
+        if relation.on_delete is models.CASCADE:
+            related._raw_delete(related.db)
+        else:
+            related.update(**{relation.field.name: None})
+    return posts._raw_delete(posts.db)
+
+
+def move_to_group(queryset, group):
+    '''Переносит посты в группу одним UPDATE; возвращает их число.'''
+    group_id = group.pk if group else None
+    moved = list(queryset.order_by().values_list('pk', 'group_id'))
+    groups = {old for _, old in moved} | {group_id}
+    count = queryset.update(group=group)
+    trending.move(moved, group_id)
+    group_stats.invalidate()
+    feeds.invalidate(*_group_scopes(groups))
+    return count
+
+
+def delete_posts(queryset):
+    '''Удаляет посты и зависимые записи по запросу на таблицу.'''
+    posts = Post.objects.filter(pk__in=queryset.values('pk')).order_by()
+    with transaction.atomic():
+        authors = set(posts.values_list('author_id', flat=True).distinct())
+        groups = set(posts.values_list('group_id', flat=True).distinct())
+        images = posts.exclude(image='').values_list(
+            'image', flat=True).distinct().iterator()
+        for batch in media_gc.batches(images):
+            media_gc.mark_stale(batch)
+        count = raw_delete(posts)
+    group_stats.invalidate()
+    feeds.invalidate(
+        'index',
+        *[f'author:{pk}' for pk in authors],
+        *_group_scopes(groups),
+    )
+    return count
+
+
+def delete_comments_by(author_ids):
+    '''Удаляет все комментарии авторов одним DELETE.'''
+    comments = Comment.objects.filter(author_id__in=author_ids).order_by()
+    return comments._raw_delete(comments.db)
+
+
+def remove_follows_of(user_ids):
+    '''Удаляет все подписки пользователей одним DELETE.'''
+    user_ids = set(user_ids)
+    follows = Follow.objects.filter(user_id__in=user_ids).order_by()
+    with transaction.atomic():
+        count = follows._raw_delete(follows.db)
+        recommendations.mark_stale(user_ids)
+    return count
@@ -0,0 +1,175 @@
+'''Рекомендации авторов по графу подписок.
+
+Расчет выполняется пакетно командой ``recommend_follows``. Граф подписок и
+активность в группах загружаются целиком в CSR-массивы (array), поэтому
+обход «подписки подписок» не порождает запросов к базе на каждого
+пользователя. Пересчитываются только пользователи, отмеченные в
+StaleRecommendation, и их подписчики: у последних меняется второй круг.
+Отмечают подписки, а также посты и комментарии в группах: если автор
+появился в группе или ушел из нее, отмечаются все активные в ней.
+'''
+import heapq
+from array import array
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Max
+
+from .models import (Comment, Follow, Group, Post, Recommendation,
+                     StaleRecommendation, User)
+
+TOP_K = 10
+FOLLOW_WEIGHT = 1.0
+GROUP_WEIGHT = 0.5
+BATCH_SIZE = 500
+
+
+def mark_stale(user_ids):
+    StaleRecommendation.objects.bulk_create(
+        [StaleRecommendation(user_id=pk) for pk in user_ids],
+        ignore_conflicts=True,
+    )
+
+
+def group_members(group_id):
+    '''Пользователи, которые пишут посты или комментарии в группе.'''
+    members = set(
+        Post.objects.filter(group_id=group_id).order_by()
+        .values_list('author_id', flat=True).distinct())
+    members.update(
+        Comment.objects.filter(post__group_id=group_id).order_by()
+        .values_list('author_id', flat=True).distinct())
+    return members
+
+
+def _mark_group_activity(user_id, group_id, post_pk):
+    stale = {user_id}
+    if post_pk is not None and not Post.objects.filter(
+            group_id=group_id, author_id=user_id).exclude(
+            pk=post_pk).exists():
+        stale.update(group_members(group_id))
+    # пост мог удаляться вместе с автором: его отметки уже сняты
+    mark_stale(User.objects.filter(pk__in=stale).values_list('pk', flat=True))
+
+
+def mark_group_activity(user_id, group_id, post=None):
+    '''Отмечает активность пользователя в группе после фиксации.
+
+    post - созданный, перенесенный или удаленный пост пользователя. Если
+    других постов автора в группе нет, состав ее авторов изменился.
+    '''
+    post_pk = None if post is None else post.pk
+    transaction.on_commit(
+        lambda: _mark_group_activity(user_id, group_id, post_pk))
+
+
+class Adjacency:
+    '''Разреженная матрица смежности в формате CSR.
+
+    pairs должны быть отсортированы по первому элементу.
+    '''
+
+    def __init__(self, pairs, size):
+        self.indptr = array('q', [0]) * (size + 1)
+        self.indices = array('q')
+        for row, col in pairs:
+            self.indptr[row + 1] += 1
+            self.indices.append(col)
+        for row in range(size):
+            self.indptr[row + 1] += self.indptr[row]
+
+    def __getitem__(self, row):
+        if row + 1 >= len(self.indptr):
+            return ()
+        return self.indices[self.indptr[row]:self.indptr[row + 1]]
+
+
+def _max_pk(model):
+    return model.objects.aggregate(pk=Max('pk'))['pk'] or 0
+
+
+def load_graph():
+    '''Загружает подписки и активность в группах за несколько запросов.'''
+    users = _max_pk(User) + 1
+    groups = _max_pk(Group) + 1
+    follows = Follow.objects.order_by('user_id').values_list(
+        'user_id', 'author_id')
+    followers = Follow.objects.order_by('author_id').values_list(
+        'author_id', 'user_id')
+    posted = Post.objects.filter(group__isnull=False).order_by().values_list(
+        'author_id', 'group_id')
+    commented = Comment.objects.filter(
+        post__group__isnull=False).values_list('author_id', 'post__group_id')
+    activity = sorted(set(posted.distinct()) | set(commented.distinct()))
+    group_authors = posted.order_by('group_id').values_list(
+        'group_id', 'author_id').distinct()
+    return {
+        'follows': Adjacency(follows.iterator(), users),
+        'followers': Adjacency(followers.iterator(), users),
+        'activity': Adjacency(activity, users),
+        'group_authors': Adjacency(group_authors.iterator(), groups),
+    }
+
+
+def recommend(graph, user_id, top_k=TOP_K):
+    '''Топ-K кандидатов для пользователя в виде пар (score, author_id).'''
+    follows = graph['follows']
+    followed = set(follows[user_id])
+    scores = defaultdict(float)
+    for author_id in followed:
+        for candidate in follows[author_id]:
+            scores[candidate] += FOLLOW_WEIGHT
+    for group_id in set(graph['activity'][user_id]):
+        for candidate in graph['group_authors'][group_id]:
+            scores[candidate] += GROUP_WEIGHT
+    scores.pop(user_id, None)
+    for author_id in followed:
+        scores.pop(author_id, None)
+    return heapq.nlargest(
+        top_k, ((score, pk) for pk, score in scores.items()))
+
+
+def affected_users(graph, stale_ids):
+    '''Пользователи с изменившимися подписками и их подписчики.'''
+    affected = set(stale_ids)
+    for user_id in stale_ids:
+        affected.update(graph['followers'][user_id])
+    return affected
+
+
+def _store(graph, user_ids, top_k):
+    rows = []
+    for user_id in user_ids:
+        rows.extend(
+            Recommendation(user_id=user_id, author_id=author_id, score=score)
+            for score, author_id in recommend(graph, user_id, top_k)
+        )
+    with transaction.atomic():
+        Recommendation.objects.filter(user_id__in=user_ids).delete()
+        Recommendation.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+
+def refresh(full=False, top_k=TOP_K):
+    '''Пересчитывает рекомендации; возвращает число пользователей.'''
+    stale_ids = list(
+        StaleRecommendation.objects.values_list('user_id', flat=True))
+    if not full and not stale_ids:
+        return 0
+    # Отметки снимаются до расчета: подписки, измененные во время него,
+    # снова попадут в очередь и будут учтены следующим запуском.
+    for start in range(0, len(stale_ids), BATCH_SIZE):
+        StaleRecommendation.objects.filter(
+            user_id__in=stale_ids[start:start + BATCH_SIZE]).delete()
+    graph = load_graph()
+    if full:
+        user_ids = list(User.objects.values_list('pk', flat=True))
+    else:
+        user_ids = list(affected_users(graph, stale_ids))
+    for start in range(0, len(user_ids), BATCH_SIZE):
+        _store(graph, user_ids[start:start + BATCH_SIZE], top_k)
+    return len(user_ids)
+
+
+def for_user(user, limit=5):
+    return Recommendation.objects.filter(
+        user=user).select_related('author')[:limit]
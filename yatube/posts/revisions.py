@@ -0,0 +1,119 @@
+'''История правок текста постов.
+
+Текущий текст хранится в Post.text, а PostRevision с номером n хранит
+версию n в виде обратной разницы: как получить ее из версии n + 1.
+Обе версии известны в момент правки, поэтому правка стоит одной вставки
+без чтения истории; одновременные правки Post.save выстраивает в
+очередь по блокировке строки поста. Чтобы восстановление оставалось
+ограниченным, каждая SNAPSHOT_EVERY-я версия (и любая, где разница не
+короче текста) хранится целиком: версия собирается одним запросом не
+более чем из SNAPSHOT_EVERY записей.
+
+Разница - JSON-список: пара [начало, конец] копирует отрезок более новой
+версии, строка вставляется как есть. Сравнение идет по словам, чтобы
+правка фразы не дробилась на отдельные буквы.
+'''
+import json
+import re
+from difflib import SequenceMatcher
+
+from .models import PostRevision
+
+SNAPSHOT_EVERY = 10
+TOKENS = re.compile(r'\s+|\w+|[^\w\s]')
+
+
+def _tokens(text):
+    return TOKENS.findall(text)
+
+
+def diff(new, old):
+    '''Разница, превращающая new в old.'''
+    new_tokens, old_tokens = _tokens(new), _tokens(old)
+    # смещения слов new в символах, чтобы копировать отрезки строки
+    offsets = [0]
+    for token in new_tokens:
+        offsets.append(offsets[-1] + len(token))
+    ops = []
+    matcher = SequenceMatcher(None, new_tokens, old_tokens, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([offsets[i1], offsets[i2]])
+        elif j2 > j1:
+            ops.append(''.join(old_tokens[j1:j2]))
+    return json.dumps(ops, ensure_ascii=False, separators=(',', ':'))
+
+
+def patch(new, data):
+    '''Восстанавливает старую версию по более новой и разнице.'''
+    return ''.join(
+        op if isinstance(op, str) else new[op[0]:op[1]]
+        for op in json.loads(data)
+    )
+
+
+def encode(number, new, old):
+    '''(snapshot, data) для версии number с текстом old.'''
+    if (number + 1) % SNAPSHOT_EVERY == 0:
+        return True, old
+    data = diff(new, old)
+    if len(data) >= len(old):
+        return True, old
+    return False, data
+
+
+def record(post, old_text):
+    '''Сохраняет прежний текст поста одной вставкой.
+
+    Вызывается после сохранения, когда post.revision уже увеличен.
+    '''
+    number = post.revision - 1
+    snapshot, data = encode(number, post.text, old_text)
+    return PostRevision.objects.create(
+        post=post, number=number, snapshot=snapshot, data=data)
+
+
+def snapshot_after(number):
+    '''Номер ближайшей версии >= number, которая всегда хранится целиком.'''
+    return number + SNAPSHOT_EVERY - 1 - number % SNAPSHOT_EVERY
+
+
+def rebuild(current, rows):
+    '''Собирает версию по записям (snapshot, data) от нее и новее.
+
+    Записи после первого снимка не нужны; без снимка сборка идет от
+    текущего текста current.
+    '''
+    for i, (snapshot, _) in enumerate(rows):
+        if snapshot:
+            rows = rows[:i + 1]
+            break
+    text = current
+    for snapshot, data in reversed(rows):
+        text = data if snapshot else patch(text, data)
+    return text
+
+
+def text_at(post, number):
+    '''Текст версии number: не больше SNAPSHOT_EVERY записей.'''
+    if number == post.revision:
+        return post.text
+    if not 0 <= number < post.revision:
+        return None
+    rows = list(
+        post.revisions.filter(
+            number__gte=number, number__lte=snapshot_after(number))
+        .order_by('number').values_list('number', 'snapshot', 'data')
+    )
+    reached = min(snapshot_after(number), post.revision - 1)
+    if [row[0] for row in rows] != list(range(number, reached + 1)):
+        return None
+    return rebuild(post.text, [row[1:] for row in rows])
+
+
+def versions(post):
+    '''Номера версий от новой к старой с датами их появления.'''
+    # версию n + 1 создала правка, сохранившая запись n
+    dates = post.revisions.order_by('-number').values_list(
+        'created', flat=True)
+    return list(zip(range(post.revision, -1, -1), [*dates, post.pub_date]))
@@ -0,0 +1,83 @@
+'''Отложенная публикация постов.
+
+Запланированный пост хранится в ScheduledPost до наступления
+publish_at, поэтому ленты по-прежнему читают Post по индексу pub_date
+без условия на текущее время. Команда ``publish_scheduled`` переносит
+созревшие посты в Post пачками: на пачку приходится один INSERT, один
+DELETE и один сброс кэшей лент и статистики групп, а не сброс на
+каждый пост. Рейтинг популярного новые посты получают при очередном
+пересчете ``rank_trending``.
+'''
+from django.db import transaction
+from django.utils import timezone
+
+from . import feeds, group_stats, media_gc
+from .models import Post, ScheduledPost
+
+BATCH_SIZE = 500
+# как часто воркер проверяет очередь, если ближайший пост еще не скоро
+POLL_INTERVAL = 60
+
+FIELDS = (
+    'author_id', 'group_id', 'text', 'image', 'image_width', 'image_height',
+)
+
+
+def schedule(post, publish_at):
+    '''Откладывает несохраненный пост из PostForm до publish_at.'''
+    return ScheduledPost.objects.create(
+        publish_at=publish_at,
+        **{field: getattr(post, field) for field in FIELDS},
+    )
+
+
+def cancel(scheduled):
+    scheduled.delete()
+    if scheduled.image:
+        media_gc.mark_stale([scheduled.image.name])
+
+
+def next_due():
+    '''Время ближайшей публикации или None.'''
+    return ScheduledPost.objects.values_list(
+        'publish_at', flat=True).first()
+
+
+def publish_batch(now, batch_size=BATCH_SIZE):
+    '''Публикует до batch_size созревших постов; возвращает их.'''
+    with transaction.atomic():
+        due = list(
+            ScheduledPost.objects.filter(publish_at__lte=now)
+            .select_for_update(skip_locked=True)
+            .values('pk', *FIELDS)[:batch_size]
+        )
+        if not due:
+            return []
+        ids = [row.pop('pk') for row in due]
+        taken = ScheduledPost.objects.filter(pk__in=ids).order_by()
+        if taken._raw_delete(taken.db) != len(ids):
+            # часть пачки уже опубликовал другой воркер
+            transaction.set_rollback(True)
+            return None
+        Post.objects.bulk_create(Post(**row) for row in due)
+    return due
+
+
+def publish_due(now=None, batch_size=BATCH_SIZE):
+    '''Публикует все созревшие посты; возвращает их число.'''
+    now = now or timezone.now()
+    published = 0
+    while True:
+        batch = publish_batch(now, batch_size)
+        if batch is None:
+            continue
+        if not batch:
+            return published
+        published += len(batch)
+        group_stats.invalidate()
+        feeds.invalidate(
+            'index',
+            *{f'author:{row["author_id"]}' for row in batch},
+            *{f'group:{row["group_id"]}' for row in batch
+              if row['group_id']},
+        )
@@ -0,0 +1,86 @@
+from django.core.signals import request_finished
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import (drafts, feeds, group_stats, media_gc, recommendations,
+               revisions, trending)
+from .models import ArchivedPost, Comment, Group, Post
+
+
+def invalidate_feeds(post):
+    scopes = ['index', f'author:{post.author_id}']
+    for group_id in {post.group_id, getattr(post, '_loaded_group_id', None)}:
+        if group_id:
+            scopes.append(f'group:{group_id}')
+    feeds.invalidate(*scopes)
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, raw=False, **kwargs):
+    # номер версии уходит в базу тем же UPDATE, что и новый текст
+    if not raw and instance.edited_text() is not None:
+        instance.revision += 1
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        trending.record(instance, trending.POST_WEIGHT)
+    elif instance.group_changed():
+        trending.move(
+            [(instance.pk, instance._loaded_group_id)], instance.group_id)
+    if created or instance.group_changed():
+        group_stats.invalidate()
+        loaded = getattr(instance, '_loaded_group_id', None)
+        for group_id in {instance.group_id, loaded} - {None}:
+            recommendations.mark_group_activity(
+                instance.author_id, group_id, instance)
+    invalidate_feeds(instance)
+    replaced = instance.replaced_image()
+    if replaced:
+        media_gc.mark_stale([replaced])
+    edited = instance.edited_text()
+    if edited is not None:
+        revisions.record(instance, edited)
+    instance._loaded_group_id = instance.group_id
+    instance._loaded_image = instance.image.name
+    instance._loaded_text = instance.text
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    group_stats.invalidate()
+    invalidate_feeds(instance)
+    if instance.group_id:
+        recommendations.mark_group_activity(
+            instance.author_id, instance.group_id, instance)
+    if instance.image:
+        media_gc.mark_stale([instance.image.name])
+
+
+@receiver(post_delete, sender=ArchivedPost)
+def archived_post_deleted(sender, instance, **kwargs):
+    invalidate_feeds(instance)
+    if instance.image:
+        media_gc.mark_stale([instance.image.name])
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    group_stats.invalidate()
+    feeds.invalidate(f'group:{instance.pk}')
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        trending.record(instance.post, trending.COMMENT_WEIGHT)
+        if instance.post.group_id:
+            recommendations.mark_group_activity(
+                instance.author_id, instance.post.group_id)
+
+
+@receiver(request_finished)
+def flush_drafts(sender, **kwargs):
+    drafts.flush()
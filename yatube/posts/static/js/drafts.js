@@ -0,0 +1,32 @@
+// Автосохранение черновика: не чаще раза в DELAY мс после последней правки.
+(function () {
+  const form = document.querySelector('form[data-draft-url]');
+  if (!form) {
+    return;
+  }
+  const DELAY = 2000;
+  const status = form.querySelector('.draft-status');
+  let timer = null;
+
+  function save() {
+    timer = null;
+    const data = new FormData();
+    data.append('text', form.elements.text.value);
+    data.append('group', form.elements.group.value);
+    data.append(
+      'csrfmiddlewaretoken', form.elements.csrfmiddlewaretoken.value);
+    fetch(form.dataset.draftUrl, {method: 'POST', body: data})
+      .then((response) => {
+        if (response.ok && status) {
+          status.textContent = 'Черновик сохранен';
+        }
+      });
+  }
+
+  form.addEventListener('input', () => {
+    if (timer) {
+      clearTimeout(timer);
+    }
+    timer = setTimeout(save, DELAY);
+  });
+})();
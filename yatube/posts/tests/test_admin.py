@@ -0,0 +1,185 @@
+from unittest import mock
+
+from core.pagination import EstimatedCountPaginator
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import (Comment, Follow, Group, Post, StaleImage,
+                      StaleRecommendation)
+
+User = get_user_model()
+
+
+class PostAdminTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='Admin', email='admin@example.com', password='pass')
+        cls.user = User.objects.create_user(username='Post_writer')
+        cls.group = Group.objects.create(
+            title='Группа А',
+            slug='group-a',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Группа Б',
+            slug='group-b',
+            description='Тестовое описание',
+        )
+        cls.admin_client = Client()
+        cls.admin_client.force_login(cls.admin)
+
+    def create_posts(self, count):
+        Post.objects.bulk_create(
+            Post(author=self.user, group=self.group, text=f'Пост {i}')
+            for i in range(count)
+        )
+        return list(Post.objects.values_list('pk', flat=True))
+
+    def changelist_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.admin_client.get(
+                reverse('admin:posts_post_changelist'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        '''Число запросов списка не зависит от числа строк'''
+        self.create_posts(3)
+        few = self.changelist_queries()
+        self.create_posts(30)
+        self.assertEqual(self.changelist_queries(), few)
+
+    def test_move_to_group_action(self):
+        '''Перенос в группу выполняется одним UPDATE'''
+        ids = self.create_posts(5)
+        with CaptureQueriesContext(connection) as queries:
+            self.admin_client.post(
+                reverse('admin:posts_post_changelist'), {
+                    'action': 'move_to_group',
+                    'group': self.other_group.pk,
+                    '_selected_action': ids[:3],
+                })
+        updates = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "posts_post"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            Post.objects.filter(group=self.other_group).count(), 3)
+
+    def test_delete_posts_action(self):
+        '''Удаление убирает посты, комментарии и ставит картинки в очередь'''
+        ids = self.create_posts(3)
+        Post.objects.filter(pk=ids[0]).update(image='posts/old.gif')
+        Comment.objects.create(post_id=ids[0], author=self.user, text='Да')
+        self.admin_client.post(
+            reverse('admin:posts_post_changelist'), {
+                'action': 'delete_posts',
+                '_selected_action': ids[:2],
+            })
+        self.assertEqual(list(Post.objects.values_list('pk', flat=True)),
+                         ids[2:])
+        self.assertFalse(Comment.objects.exists())
+        self.assertTrue(StaleImage.objects.filter(name='posts/old.gif'))
+
+    def test_estimated_count(self):
+        '''Сверх порога число строк оценивается по pk без полного COUNT'''
+        self.create_posts(5)
+        queryset = Post.objects.all()
+        with mock.patch.object(EstimatedCountPaginator, 'COUNT_LIMIT', 3):
+            estimated = EstimatedCountPaginator(queryset, 2).count
+        self.assertEqual(estimated, queryset.order_by('-pk').first().pk)
+        self.assertEqual(EstimatedCountPaginator(queryset, 2).count, 5)
+
+
+class ModerationAdminTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='Admin', email='admin@example.com', password='pass')
+        cls.spammer = User.objects.create_user(username='Spammer')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.post = Post.objects.create(author=cls.reader, text='Пост')
+        cls.admin_client = Client()
+        cls.admin_client.force_login(cls.admin)
+
+    def test_comments_paginated_by_cursor(self):
+        '''Список комментариев листается курсором без COUNT и OFFSET'''
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.spammer, text=f'Спам {i}')
+            for i in range(5)
+        )
+        ids = list(Comment.objects.order_by('-pk').values_list(
+            'pk', flat=True))
+        address = reverse('admin:posts_comment_changelist')
+        comment_admin = admin.site._registry[Comment]
+        with mock.patch.object(comment_admin, 'list_per_page', 3):
+            with CaptureQueriesContext(connection) as queries:
+                first = self.admin_client.get(address)
+            second = self.admin_client.get(address, {'cursor': ids[2]})
+        sql = ' '.join(query['sql'] for query in queries.captured_queries)
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+        cl = first.context['cl']
+        self.assertEqual([c.pk for c in cl.result_list], ids[:3])
+        self.assertIn(f'cursor={ids[2]}', cl.next_url)
+        cl = second.context['cl']
+        self.assertEqual([c.pk for c in cl.result_list], ids[3:])
+        self.assertIsNone(cl.next_url)
+
+    def test_comment_author_filter(self):
+        '''Список комментариев фильтруется по автору'''
+        Comment.objects.create(post=self.post, author=self.spammer, text='1')
+        Comment.objects.create(post=self.post, author=self.reader, text='2')
+        response = self.admin_client.get(
+            reverse('admin:posts_comment_changelist'),
+            {'author__id__exact': self.spammer.pk},
+        )
+        authors = {c.author for c in response.context['cl'].result_list}
+        self.assertEqual(authors, {self.spammer})
+
+    def test_delete_comments_by_authors(self):
+        '''Действие удаляет все комментарии автора одним DELETE'''
+        spam = [
+            Comment.objects.create(
+                post=self.post, author=self.spammer, text=f'Спам {i}')
+            for i in range(3)
+        ]
+        Comment.objects.create(post=self.post, author=self.reader, text='Да')
+        with CaptureQueriesContext(connection) as queries:
+            self.admin_client.post(
+                reverse('admin:posts_comment_changelist'), {
+                    'action': 'delete_by_authors',
+                    '_selected_action': [spam[0].pk],
+                })
+        deletes = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('DELETE FROM "posts_comment"')
+        ]
+        self.assertEqual(len(deletes), 1)
+        self.assertEqual(
+            list(Comment.objects.values_list('author', flat=True)),
+            [self.reader.pk])
+
+    def test_remove_follows_of_users(self):
+        '''Действие удаляет все подписки пользователя и помечает его'''
+        author = User.objects.create_user(username='Author')
+        first = Follow.objects.create(user=self.spammer, author=author)
+        Follow.objects.create(user=self.spammer, author=self.reader)
+        Follow.objects.create(user=self.reader, author=author)
+        self.admin_client.post(
+            reverse('admin:posts_follow_changelist'), {
+                'action': 'remove_follows_of_users',
+                '_selected_action': [first.pk],
+            })
+        self.assertFalse(Follow.objects.filter(user=self.spammer).exists())
+        self.assertTrue(Follow.objects.filter(user=self.reader).exists())
+        self.assertTrue(
+            StaleRecommendation.objects.filter(user=self.spammer).exists())
@@ -0,0 +1,180 @@
+from datetime import timedelta
+from unittest import mock
+
+from core import cache as core_cache
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import archive
+from ..models import (ArchivedComment, ArchivedPost, Comment, Follow, Group,
+                      Post)
+
+User = get_user_model()
+
+
+class ArchiveTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Post_writer')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        now = timezone.now()
+        for i in range(25):
+            post = Post.objects.create(
+                author=cls.user, group=cls.group, text=f'Пост {i}')
+            # первые 15 постов - двухлетней давности
+            age = timedelta(days=730 if i < 15 else 0, minutes=25 - i)
+            Post.objects.filter(pk=post.pk).update(pub_date=now - age)
+        cls.old_post = Post.objects.order_by('pub_date').first()
+        cls.comment = Comment.objects.create(
+            post=cls.old_post, author=cls.user, text='Старый комментарий')
+        cls.ordered = list(Post.objects.values_list('pk', flat=True))
+        cls.guest_client = Client()
+
+    def setUp(self):
+        caches['default'].clear()
+        caches['posts'].clear()
+
+    def page_ids(self, address, page):
+        response = self.guest_client.get(address, {'page': page})
+        return [row.id for row in response.context['page_obj']]
+
+    def test_archive_moves_old_posts_with_comments(self):
+        '''Старые посты переносятся в архив с комментариями и датами'''
+        self.assertEqual(archive.archive(batch_size=4), 15)
+        self.assertEqual(Post.objects.count(), 10)
+        archived = ArchivedPost.objects.get(pk=self.old_post.pk)
+        self.assertEqual(archived.created, self.old_post.created)
+        self.assertEqual(archived.pub_date, self.old_post.pub_date)
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(
+            ArchivedComment.objects.get(pk=self.comment.pk).post, archived)
+        self.assertEqual(archive.archive(), 0)
+
+    def test_feeds_page_into_archive(self):
+        '''Ленты продолжаются архивом в прежнем порядке'''
+        archive.archive()
+        for address in (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.user.username]),
+        ):
+            with self.subTest(address=address):
+                ids = [
+                    pk for page in (1, 2, 3)
+                    for pk in self.page_ids(address, page)
+                ]
+                self.assertEqual(ids, self.ordered)
+
+    def test_first_page_reads_only_hot_posts(self):
+        '''Первая страница не читает строки архива'''
+        archive.archive()
+        address = reverse('posts:profile', args=[self.user.username])
+        self.guest_client.get(address)
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(address)
+        archived = [
+            query['sql'] for query in queries.captured_queries
+            if 'posts_archivedpost' in query['sql']
+        ]
+        # число архивных постов взято из кэша
+        self.assertEqual(archived, [])
+
+    def test_cached_index_fragment_skips_feed_queries(self):
+        '''При закэшированном фрагменте главная только считает посты'''
+        archive.archive()
+        self.guest_client.get(reverse('posts:index'))
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(reverse('posts:index'))
+        self.assertEqual([
+            query['sql'] for query in queries.captured_queries
+            if 'posts_' in query['sql']
+        ], ['SELECT COUNT(*) AS "__count" FROM "posts_post"'])
+
+    def test_count_query_has_no_joins(self):
+        '''Число постов ленты считается без соединений'''
+        with CaptureQueriesContext(connection) as queries:
+            archive.feed(f'group:{self.group.pk}', group=self.group).count()
+        for query in queries.captured_queries:
+            self.assertIn('COUNT(', query['sql'])
+            self.assertNotIn('JOIN', query['sql'])
+
+    def test_count_follows_archived_deletes(self):
+        '''Удаление архивного поста сбрасывает число постов ленты'''
+        archive.archive()
+        feed = archive.feed(f'author:{self.user.pk}', author=self.user)
+        self.assertEqual(feed.count(), 25)
+        ArchivedPost.objects.get(pk=self.old_post.pk).delete()
+        self.assertEqual(
+            archive.feed(f'author:{self.user.pk}', author=self.user).count(),
+            24)
+
+    def test_post_created_during_count_not_lost(self):
+        '''Пост, созданный между подсчетом и записью в кэш, виден в ленте'''
+        archive.archive()
+        put = core_cache.put
+
+        def put_after_new_post(*args, **kwargs):
+            Post.objects.create(author=self.user, text='Новый пост')
+            put(*args, **kwargs)
+
+        with mock.patch.object(core_cache, 'put', put_after_new_post):
+            archive.feed(f'author:{self.user.pk}', author=self.user).count()
+        feed = archive.feed(f'author:{self.user.pk}', author=self.user)
+        self.assertEqual(feed.count(), 26)
+        self.assertEqual(
+            [row.id for row in feed[:30]][-1], self.ordered[-1])
+        response = self.guest_client.get(
+            reverse('posts:profile', args=[self.user.username]))
+        self.assertEqual(response.context['count'], 26)
+
+    def test_exports_follows_and_syndication_include_archive(self):
+        '''Выгрузки, подписки и RSS читают и архив'''
+        archive.archive()
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=self.user)
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(reverse(
+            'posts:profile_export', args=[self.user.username, 'jsonl']))
+        lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual(len(lines), 25)
+
+        client.force_login(reader)
+        ids = [
+            pk for page in (1, 2, 3)
+            for pk in [row.id for row in client.get(
+                reverse('posts:follow_index'),
+                {'page': page}).context['page_obj']]
+        ]
+        self.assertEqual(ids, self.ordered)
+
+        response = self.guest_client.get(reverse(
+            'posts:profile_feed', args=[self.user.username, 'rss']))
+        self.assertEqual(response.content.count(b'<item>'), 20)
+
+    def test_archived_post_detail(self):
+        '''Архивный пост открывается по прежнему адресу без формы'''
+        archive.archive()
+        response = self.guest_client.get(
+            reverse('posts:post_detail', args=[self.old_post.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['count'], 25)
+        self.assertIsNone(response.context['form'])
+        self.assertContains(response, 'Старый комментарий')
+
+    def test_group_stats_count_archive(self):
+        '''Каталог групп учитывает архивные посты'''
+        archive.archive()
+        response = self.guest_client.get(reverse('posts:group_index'))
+        group, = response.context['groups']
+        self.assertEqual((group.posts_count, group.authors_count), (25, 1))
@@ -0,0 +1,218 @@
+import asyncio
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signals
+from django.core.cache import caches
+from django.core.wsgi import get_wsgi_application
+from django.db import close_old_connections
+from django.test import Client, TestCase, TransactionTestCase
+
+from core.asgi import AsgiHandler
+
+from .. import exports
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+def receiver(*messages):
+    '''receive, который отдает messages и дальше ждет, как сервер.'''
+    queue = list(messages)
+
+    async def receive():
+        if queue:
+            return queue.pop(0)
+        await asyncio.Event().wait()
+
+    return receive
+
+
+async def fetch(handler, path, headers=()):
+    '''GET-запрос к ASGI-приложению; возвращает статус и тело.'''
+    messages = []
+    receive = receiver({'type': 'http.request', 'body': b''})
+
+    async def send(message):
+        messages.append(message)
+        # отдаем управление, чтобы ответы перемежались
+        await asyncio.sleep(0)
+
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': path,
+        'query_string': b'',
+        'headers': [(b'host', b'testserver'), *headers],
+    }
+    await handler(scope, receive, send)
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    return messages[0]['status'], body.decode()
+
+
+class InlineExecutor(Executor):
+    '''Выполняет задачи в текущем потоке, внутри транзакции теста.'''
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+class AsgiFeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Post_writer')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Пост через ASGI',
+            group=cls.group,
+        )
+
+    def setUp(self):
+        caches['posts'].clear()
+        # как и тестовый Client, не закрываем соединение после запроса
+        signals.request_finished.disconnect(close_old_connections)
+        self.addCleanup(
+            signals.request_finished.connect, close_old_connections)
+        self.handler = AsgiHandler(get_wsgi_application(), InlineExecutor())
+
+    def request(self, path):
+        return asyncio.run(fetch(self.handler, path))
+
+    def test_feed_pages_over_asgi(self):
+        '''Ленты отдаются через ASGI-приложение'''
+        for path in ('/', '/group/test-slug/', '/profile/Post_writer/',
+                     f'/posts/{self.post.id}/'):
+            with self.subTest(path=path):
+                status, body = self.request(path)
+                self.assertEqual(status, 200)
+                self.assertIn('Пост через ASGI', body)
+
+    def test_not_found_over_asgi(self):
+        '''Несуществующая страница возвращает 404'''
+        status, _ = self.request('/unexisting_page/')
+        self.assertEqual(status, 404)
+
+
+class AsgiThreadsTest(TransactionTestCase):
+    '''Потоковые ответы в настоящем пуле потоков.'''
+
+    def setUp(self):
+        self.authors = []
+        for i in range(3):
+            author = User.objects.create_user(username=f'exporter_{i}')
+            Post.objects.bulk_create(
+                Post(author=author, text=f'Пост {n}') for n in range(200))
+            client = Client()
+            client.force_login(author)
+            cookie = client.cookies[settings.SESSION_COOKIE_NAME].value
+            self.authors.append((author, cookie))
+        self.executor = ThreadPoolExecutor(4)
+        self.addCleanup(self.executor.shutdown)
+
+    def test_concurrent_streaming_exports(self):
+        '''Тело ответа перебирается в потоке, выполнявшем представление.
+
+        Курсор выгрузки принадлежит соединению этого потока; в другом
+        потоке соединение могло быть закрыто чужим request_finished.
+        '''
+        handler = AsgiHandler(get_wsgi_application(), self.executor)
+        content_type, csv_lines = exports.EXPORTERS['csv']
+        foreign = []
+
+        def lines(request, rows, title):
+            view_thread = threading.get_ident()
+            for line in csv_lines(request, rows, title):
+                if threading.get_ident() != view_thread:
+                    foreign.append(line)
+                yield line
+
+        async def export_all():
+            return await asyncio.gather(*(
+                fetch(
+                    handler, f'/profile/{author.username}/export/csv/',
+                    [(b'cookie', f'{settings.SESSION_COOKIE_NAME}='
+                      f'{cookie}'.encode())],
+                )
+                for author, cookie in self.authors
+            ))
+
+        with mock.patch.object(exports, 'EXPORT_CHUNK_SIZE', 50), \
+                mock.patch.dict(exports.EXPORTERS,
+                                {'csv': (content_type, lines)}):
+            results = asyncio.run(export_all())
+        for status, body in results:
+            self.assertEqual(status, 200)
+            # заголовок и 200 строк
+            self.assertEqual(len(body.splitlines()), 201)
+        self.assertEqual(foreign, [])
+
+    def test_disconnect_stops_streaming_export(self):
+        '''Ушедший клиент освобождает поток, даже если send молчит'''
+        handler = AsgiHandler(get_wsgi_application(), self.executor)
+        content_type, csv_lines = exports.EXPORTERS['csv']
+        produced = []
+        sent = []
+        requests = [{'type': 'http.request', 'body': b''}]
+        gone = asyncio.Event()
+
+        def lines(request, rows, title):
+            for line in csv_lines(request, rows, title):
+                produced.append(line)
+                yield line
+
+        async def receive():
+            if requests:
+                return requests.pop()
+            await gone.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            # как uvicorn: отправка в закрытое соединение не падает
+            sent.append(message)
+            if message.get('body'):
+                gone.set()
+
+        author, cookie = self.authors[0]
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': f'/profile/{author.username}/export/csv/',
+            'query_string': b'',
+            'headers': [
+                (b'host', b'testserver'),
+                (b'cookie', f'{settings.SESSION_COOKIE_NAME}='
+                            f'{cookie}'.encode()),
+            ],
+        }
+        with mock.patch.object(exports, 'EXPORT_CHUNK_SIZE', 50), \
+                mock.patch.dict(exports.EXPORTERS,
+                                {'csv': (content_type, lines)}):
+            asyncio.run(handler(scope, receive, send))
+        self.assertLess(len(produced), 100)
+        self.assertNotEqual(sent[-1], {'type': 'http.response.body',
+                                       'body': b''})
+
+    def test_disconnect_during_request_body(self):
+        '''Представление не вызывается с недочитанным телом'''
+        app = mock.Mock()
+        handler = AsgiHandler(app, self.executor)
+        send = mock.AsyncMock()
+        receive = receiver(
+            {'type': 'http.request', 'body': b'text=', 'more_body': True},
+            {'type': 'http.disconnect'},
+        )
+        scope = {'type': 'http', 'method': 'POST', 'path': '/create/'}
+        asyncio.run(handler(scope, receive, send))
+        app.assert_not_called()
+        send.assert_not_called()
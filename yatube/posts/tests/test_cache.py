@@ -0,0 +1,115 @@
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from core import cache as core_cache
+from core.cache import get_or_refresh, metrics, namespace, put
+from core.sqlite_cache import SQLiteCache
+from django.test import SimpleTestCase
+
+
+class CacheTest(SimpleTestCase):
+    def setUp(self):
+        for name in ('posts', 'users', 'core'):
+            namespace(name).clear()
+
+    def test_namespaces_do_not_overlap(self):
+        '''Одинаковые ключи приложений не пересекаются'''
+        namespace('posts').set('key', 'posts')
+        namespace('users').set('key', 'users')
+        namespace('posts').clear()
+        self.assertIsNone(namespace('posts').get('key'))
+        self.assertEqual(namespace('users').get('key'), 'users')
+
+    def test_value_computed_once(self):
+        '''Одновременные промахи пересчитывают значение один раз'''
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'value'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(get_or_refresh(
+                namespace('posts'), 'hot', compute, 60)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['value'] * 5)
+
+    def test_stale_value_served_during_refresh(self):
+        '''Пока один запрос пересчитывает, остальным отдается старое'''
+        cache = namespace('posts')
+        put(cache, 'hot', 'old', timeout=-1)
+        cache.add('hot:lock', True)
+        self.assertEqual(
+            get_or_refresh(cache, 'hot', lambda: 'new', 60), 'old')
+        cache.delete('hot:lock')
+        self.assertEqual(
+            get_or_refresh(cache, 'hot', lambda: 'new', 60), 'new')
+        self.assertEqual(metrics()['hot']['stale'], 1)
+        self.assertEqual(metrics()['hot']['count'], 1)
+
+    def test_early_refresh_before_expiry(self):
+        '''Долгий пересчет начинается заранее, незадолго до срока'''
+        cache = namespace('posts')
+        put(cache, 'slow', 'old', timeout=1, delta=100)
+        put(cache, 'fast', 'old', timeout=1, delta=0.01)
+        with mock.patch('core.cache.random.random', return_value=0.5):
+            self.assertEqual(
+                get_or_refresh(cache, 'slow', lambda: 'new', 60), 'new')
+            self.assertEqual(
+                get_or_refresh(cache, 'fast', lambda: 'new', 60), 'old')
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = SQLiteCache(
+            os.path.join(directory.name, 'cache.sqlite3'), {})
+
+    def test_add_and_incr(self):
+        '''add не перезаписывает ключ, incr считает в базе'''
+        self.assertTrue(self.cache.add('hits', 0))
+        self.assertFalse(self.cache.add('hits', 10))
+        self.assertEqual(self.cache.incr('hits'), 1)
+        self.assertEqual(self.cache.incr('hits', 5), 6)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_values_and_expiry(self):
+        '''Значения переживают pickle, истекшие ключи не отдаются'''
+        self.cache.set('page', {'body': b'<html>'})
+        self.assertEqual(self.cache.get('page'), {'body': b'<html>'})
+        self.cache.set('gone', 1, timeout=-1)
+        self.assertIsNone(self.cache.get('gone'))
+        self.assertTrue(self.cache.add('gone', 2))
+        self.assertEqual(self.cache.get('gone'), 2)
+
+    def test_metrics_counted_atomically(self):
+        '''Счетчики метрик из разных потоков не теряют обновлений'''
+        def record():
+            for _ in range(50):
+                core_cache._record('feed', 0.001)
+                core_cache._record('feed')
+
+        with mock.patch.object(
+                core_cache, 'namespace', return_value=self.cache):
+            threads = [threading.Thread(target=record) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            metric = metrics()['feed']
+        self.assertEqual((metric['count'], metric['stale']), (200, 200))
+        self.assertAlmostEqual(metric['total'], 0.2)
+        self.assertEqual(metric['max'], 0.001)
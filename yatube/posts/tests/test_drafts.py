@@ -0,0 +1,128 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import drafts
+from ..models import Draft, Group, Post
+
+User = get_user_model()
+
+
+class DraftTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Post_writer')
+        cls.other_user = User.objects.create_user(username='Other_writer')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.authorised_client = Client()
+        cls.authorised_client.force_login(cls.user)
+
+    def setUp(self):
+        caches['posts'].clear()
+        drafts.buffer.take()
+
+    def later(self):
+        return time.monotonic() + drafts.FLUSH_INTERVAL
+
+    def test_autosave_writes_cache_only(self):
+        '''Автосохранение до истечения интервала не обращается к базе'''
+        with self.assertNumQueries(0):
+            for text in ('Ч', 'Че', 'Чер'):
+                drafts.autosave(self.user, text)
+        self.assertEqual(drafts.load(self.user)['text'], 'Чер')
+        self.assertFalse(Draft.objects.exists())
+
+    def test_flush_coalesces_drafts(self):
+        '''Правки схлопываются и пишутся в базу одной пачкой'''
+        for text in ('Ч', 'Че', 'Чер'):
+            drafts.autosave(self.user, text)
+            drafts.autosave(self.other_user, text * 2)
+        with CaptureQueriesContext(connection) as queries:
+            drafts.flush(self.later())
+        writes = [
+            query['sql'].split()[0] for query in queries.captured_queries
+            if 'posts_draft' in query['sql']
+        ]
+        self.assertEqual(writes, ['SELECT', 'DELETE', 'INSERT'])
+        self.assertEqual(
+            dict(Draft.objects.values_list('user', 'text')),
+            {self.user.pk: 'Чер', self.other_user.pk: 'ЧерЧер'})
+        caches['posts'].clear()
+        self.assertEqual(drafts.load(self.user)['text'], 'Чер')
+
+    def test_autosave_endpoint(self):
+        '''Эндпоинт сохраняет черновик и принимает только POST'''
+        address = reverse('posts:draft_autosave')
+        response = self.authorised_client.post(
+            address, {'text': 'Черновик', 'group': self.group.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('updated', response.json())
+        draft = drafts.load(self.user)
+        self.assertEqual(
+            (draft['text'], draft['group_id']), ('Черновик', self.group.pk))
+        self.assertEqual(self.authorised_client.get(address).status_code, 405)
+        self.assertEqual(Client().post(address).status_code, 302)
+
+    def test_publish_from_draft(self):
+        '''Пост публикуется из черновика, черновик удаляется'''
+        drafts.autosave(self.user, 'Из черновика', self.group.pk)
+        drafts.flush(self.later())
+        response = self.authorised_client.get(reverse('posts:post_create'))
+        self.assertEqual(
+            response.context['form'].initial['text'], 'Из черновика')
+        self.authorised_client.post(
+            reverse('posts:post_create'),
+            {'text': 'Из черновика', 'group': self.group.pk})
+        self.assertTrue(Post.objects.filter(
+            text='Из черновика', group=self.group).exists())
+        self.assertIsNone(drafts.load(self.user))
+
+    def test_published_draft_not_restored(self):
+        '''Отложенная запись не возвращает опубликованный черновик'''
+        draft = drafts.autosave(self.user, 'Старый черновик')
+        drafts.discard(self.user)
+        drafts.write({self.user.pk: draft})
+        self.assertFalse(Draft.objects.filter(text='Старый черновик').exists())
+        self.assertIsNone(drafts.load(self.user))
+
+    def test_publish_without_draft_writes_nothing(self):
+        '''Публикация без черновика не трогает таблицу черновиков'''
+        with CaptureQueriesContext(connection) as queries:
+            self.authorised_client.post(
+                reverse('posts:post_create'), {'text': 'Без черновика'})
+        writes = [
+            query['sql'].split()[0] for query in queries.captured_queries
+            if 'posts_draft' in query['sql']
+            and not query['sql'].startswith('SELECT')
+        ]
+        # форма читает черновик, discard делает один UPDATE без вставки
+        self.assertEqual(writes, ['UPDATE'])
+        self.assertFalse(Draft.objects.exists())
+        # отметка ставится обновлением уже записанного черновика
+        drafts.autosave(self.user, 'Черновик')
+        drafts.flush(self.later())
+        drafts.discard(self.user)
+        self.assertEqual(Draft.objects.get().text, '')
+
+    def test_stale_cached_draft_not_restored(self):
+        '''Копия черновика в кэше другого процесса не переживает публикацию'''
+        draft = drafts.autosave(self.user, 'Старый черновик')
+        drafts.discard(self.user)
+        # кэш в памяти другого процесса публикацию не видел
+        caches['posts'].set(drafts._key(self.user.pk), draft)
+        self.assertIsNone(drafts.load(self.user))
+        newer = drafts.autosave(self.user, 'Новый черновик')
+        self.assertEqual(drafts.load(self.user), newer)
+        drafts.write({self.user.pk: newer})
+        caches['posts'].clear()
+        self.assertEqual(drafts.load(self.user)['text'], 'Новый черновик')
@@ -0,0 +1,79 @@
+import csv
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Post_writer')
+        cls.other_user = User.objects.create_user(username='Other_user')
+        cls.admin = User.objects.create_user(
+            username='Admin', is_staff=True)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(3):
+            Post.objects.create(
+                author=cls.user, text=f'Пост {i}, с "кавычками"',
+                group=cls.group)
+        Post.objects.create(author=cls.other_user, text='Чужой пост')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.user)
+        cls.other_client = Client()
+        cls.other_client.force_login(cls.other_user)
+        cls.admin_client = Client()
+        cls.admin_client.force_login(cls.admin)
+
+    def export(self, client, fmt, name='posts:profile_export',
+               arg='Post_writer'):
+        response = client.get(reverse(name, args=[arg, fmt]))
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_profile_export_csv(self):
+        '''CSV содержит все посты автора и только их'''
+        rows = list(csv.reader(io.StringIO(
+            self.export(self.author_client, 'csv'))))
+        self.assertEqual(rows[0][0], 'id')
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1][4], 'Пост 2, с "кавычками"')
+
+    def test_profile_export_jsonl(self):
+        '''Каждая строка JSONL - отдельный пост'''
+        lines = self.export(self.author_client, 'jsonl').splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[0])['group'], 'test-slug')
+
+    def test_group_export_atom_for_staff(self):
+        '''Администратор выгружает группу в Atom'''
+        Post.objects.create(
+            author=self.other_user, text='<b>разметка</b>', group=self.group)
+        feed = self.export(
+            self.admin_client, 'atom', 'posts:group_export', 'test-slug')
+        self.assertEqual(feed.count('<entry>'), 4)
+        self.assertIn('&lt;b&gt;разметка', feed)
+        self.assertTrue(feed.rstrip().endswith('</feed>'))
+
+    def test_export_permissions(self):
+        '''Чужие посты и группы выгрузить нельзя'''
+        response = self.other_client.get(
+            reverse('posts:profile_export', args=['Post_writer', 'csv']))
+        self.assertEqual(response.status_code, 403)
+        response = self.author_client.get(
+            reverse('posts:group_export', args=['test-slug', 'csv']))
+        self.assertEqual(response.status_code, 403)
+        response = self.author_client.get(
+            reverse('posts:profile_export', args=['Post_writer', 'xml']))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,96 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class FeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Post_writer')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Первый пост', group=cls.group)
+        cls.guest_client = Client()
+
+    def setUp(self):
+        caches['posts'].clear()
+
+    def test_feeds_available(self):
+        '''Ленты главной, группы и автора в обоих форматах'''
+        urls = (
+            reverse('posts:index_feed', args=['atom']),
+            reverse('posts:index_feed', args=['rss']),
+            reverse('posts:group_feed', args=['test-slug', 'atom']),
+            reverse('posts:profile_feed', args=['Post_writer', 'rss']),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Первый пост')
+                self.assertTrue(response.has_header('ETag'))
+        response = self.guest_client.get(
+            reverse('posts:index_feed', args=['json']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_conditional_get_and_cache(self):
+        '''Повторный опрос с ETag получает 304 без запросов к базе'''
+        url = reverse('posts:index_feed', args=['atom'])
+        etag = self.guest_client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(ALLOWED_HOSTS=['*'])
+    def test_links_follow_host_and_scheme(self):
+        '''Ссылки ленты строятся от хоста и схемы запроса'''
+        url = reverse('posts:index_feed', args=['atom'])
+        requests = (
+            ('http://one.example', {'HTTP_HOST': 'one.example'}),
+            ('https://two.example',
+             {'HTTP_HOST': 'two.example', 'secure': True}),
+        )
+        for origin, extra in requests:
+            with self.subTest(origin=origin):
+                response = self.guest_client.get(url, **extra)
+                self.assertContains(response, f'{origin}/posts/')
+        # правка сбрасывает ленты всех хостов
+        Post.objects.filter(pk=self.post.pk).get().delete()
+        for origin, extra in requests:
+            with self.subTest(origin=origin):
+                self.assertNotContains(
+                    self.guest_client.get(url, **extra), 'Первый пост')
+
+    def test_edit_invalidates_scopes(self):
+        '''Перенос поста обновляет ленты обеих групп'''
+        old_url = reverse('posts:group_feed', args=['test-slug', 'atom'])
+        new_url = reverse('posts:group_feed', args=['other-slug', 'atom'])
+        self.guest_client.get(old_url)
+        self.guest_client.get(new_url)
+        post = Post.objects.get(pk=self.post.pk)
+        post.group = self.other_group
+        post.save()
+        self.assertNotContains(self.guest_client.get(old_url), 'Первый пост')
+        self.assertContains(self.guest_client.get(new_url), 'Первый пост')
+
+    def test_delete_invalidates_feed(self):
+        '''Удаленный пост пропадает из ленты автора'''
+        url = reverse('posts:profile_feed', args=['Post_writer', 'atom'])
+        self.assertContains(self.guest_client.get(url), 'Первый пост')
+        Post.objects.get(pk=self.post.pk).delete()
+        self.assertNotContains(self.guest_client.get(url), 'Первый пост')
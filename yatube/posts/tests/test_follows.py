@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import follows
+from ..models import Follow
+
+User = get_user_model()
+
+
+class FollowServiceTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.other_reader = User.objects.create_user(username='Other_reader')
+        cls.authors = [
+            User.objects.create_user(username=f'Author{i}') for i in range(5)
+        ]
+
+    def test_follow_is_idempotent(self):
+        '''Повторная подписка не создает дубликат'''
+        follows.follow(self.reader, self.authors[0])
+        follows.follow(self.reader, self.authors[0])
+        self.assertEqual(Follow.objects.filter(user=self.reader).count(), 1)
+
+    def test_self_follow_ignored(self):
+        '''Подписка на себя игнорируется и в пакетном режиме'''
+        follows.follow_many(self.reader, [self.reader, self.authors[0]])
+        self.assertFalse(
+            Follow.objects.filter(user=self.reader, author=self.reader)
+            .exists()
+        )
+
+    def test_unfollow_keeps_other_users_follows(self):
+        '''Отписка удаляет только подписку самого пользователя'''
+        follows.follow(self.reader, self.authors[0])
+        follows.follow(self.other_reader, self.authors[0])
+        follows.unfollow(self.reader, self.authors[0])
+        self.assertFalse(follows.is_following(self.reader, self.authors[0]))
+        self.assertTrue(
+            follows.is_following(self.other_reader, self.authors[0])
+        )
+
+    def test_bulk_follow_and_unfollow(self):
+        '''Пакетные подписка и отписка'''
+        follows.follow_many(self.reader, self.authors)
+        self.assertEqual(Follow.objects.filter(user=self.reader).count(), 5)
+        # удаление и отметка для пересчета рекомендаций
+        with self.assertNumQueries(2):
+            follows.unfollow_many(self.reader, self.authors[:3])
+        self.assertEqual(Follow.objects.filter(user=self.reader).count(), 2)
+
+    def test_following_cursor_pages(self):
+        '''Список подписок листается курсором без пропусков и повторов'''
+        follows.follow_many(self.reader, self.authors)
+        client = Client()
+        url = reverse('posts:profile_following', args=[self.reader.username])
+        seen = []
+        cursor = ''
+        old_per_page = follows.FOLLOW_PER_PAGE
+        follows.FOLLOW_PER_PAGE = 2
+        try:
+            while cursor is not None:
+                response = client.get(url, {'cursor': cursor})
+                page = response.context['page_obj']
+                seen.extend(author.username for author in page)
+                cursor = page.next_cursor
+        finally:
+            follows.FOLLOW_PER_PAGE = old_per_page
+        self.assertCountEqual(
+            seen, [author.username for author in self.authors]
+        )
+
+    def test_followers_page(self):
+        '''Страница подписчиков показывает подписавшихся'''
+        follows.follow(self.reader, self.authors[0])
+        response = Client().get(
+            reverse(
+                'posts:profile_followers', args=[self.authors[0].username]
+            )
+        )
+        self.assertEqual(list(response.context['page_obj']), [self.reader])
@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class GroupIndexTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Post_writer')
+        cls.other_user = User.objects.create_user(username='Other_writer')
+        cls.group = Group.objects.create(
+            title='Группа А',
+            slug='group-a',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Группа Б',
+            slug='group-b',
+            description='Тестовое описание',
+        )
+        for author in (cls.user, cls.user, cls.other_user):
+            Post.objects.create(author=author, text='Пост', group=cls.group)
+        cls.guest_client = Client()
+
+    def setUp(self):
+        caches['posts'].clear()
+
+    def stats(self):
+        response = self.guest_client.get(reverse('posts:group_index'))
+        return {
+            group.slug: (group.posts_count, group.authors_count)
+            for group in response.context['groups']
+        }
+
+    def test_group_index_counts(self):
+        '''Каталог групп показывает число постов и авторов'''
+        self.assertEqual(
+            self.stats(), {'group-a': (3, 2), 'group-b': (0, 0)})
+
+    def test_group_index_fixed_queries_and_cache(self):
+        '''Статистика считается запросом на таблицу и берется из кэша'''
+        # группы с горячими постами, архивные посты, пары группа-автор
+        with self.assertNumQueries(3):
+            self.stats()
+        with self.assertNumQueries(0):
+            self.stats()
+
+    def test_moving_post_invalidates_cache(self):
+        '''Перенос поста в другую группу сбрасывает кэш'''
+        self.stats()
+        post = Post.objects.filter(author=self.user).first()
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(
+            self.stats(), {'group-a': (2, 2), 'group-b': (1, 1)})
+
+    def test_editing_text_keeps_cache(self):
+        '''Правка текста без смены группы не сбрасывает кэш'''
+        self.stats()
+        post = Post.objects.filter(group=self.group).first()
+        post.text = 'Новый текст'
+        post.save()
+        with self.assertNumQueries(0):
+            self.stats()
@@ -0,0 +1,80 @@
+import io
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .. import images
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_upload(name, size, image_format, exif=None):
+    buffer = io.BytesIO()
+    params = {'exif': exif} if exif else {}
+    Image.new('RGB', size, 'white').save(buffer, image_format, **params)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT,
+                   THUMBNAIL_KVSTORE_PATH=':memory:')
+class ImageUploadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Post_writer')
+        cls.authorised_client = Client()
+        cls.authorised_client.force_login(cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_large_photo_is_normalized(self):
+        '''Большое фото уменьшается, теряет EXIF и сохраняет размеры'''
+        exif = Image.Exif()
+        exif[0x010F] = 'PhoneMaker'
+        # ориентация 6: снимок нужно повернуть на 90 градусов
+        exif[0x0112] = 6
+        upload = make_upload('photo.jpg', (3000, 2000), 'JPEG', exif)
+        self.authorised_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Фото', 'image': upload},
+        )
+        post = Post.objects.get(text='Фото')
+        self.assertEqual((post.image_width, post.image_height), (1280, 1920))
+        with Image.open(post.image.path) as saved:
+            self.assertEqual(saved.size, (1280, 1920))
+            self.assertNotIn('exif', saved.info)
+
+    def test_small_image_keeps_name_and_size(self):
+        '''Небольшая картинка сохраняет имя и размеры'''
+        upload = make_upload('small.png', (100, 50), 'PNG')
+        processed, size = images.normalize(upload)
+        self.assertEqual(processed.name, 'small.png')
+        self.assertEqual(size, (100, 50))
+
+    def test_edit_without_new_image_keeps_dimensions(self):
+        '''Правка текста не сбрасывает размеры картинки'''
+        upload = make_upload('edit.gif', (120, 80), 'GIF')
+        self.authorised_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'До правки', 'image': upload},
+        )
+        post = Post.objects.get(text='До правки')
+        self.authorised_client.post(
+            reverse('posts:post_edit', args=[post.id]),
+            data={'text': 'После правки'},
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.text, 'После правки')
+        self.assertEqual((post.image_width, post.image_height), (120, 80))
@@ -0,0 +1,129 @@
+import io
+import os
+import shutil
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+from sorl.thumbnail import default, get_thumbnail
+
+from ..models import Post, StaleImage
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def gif(color):
+    buffer = io.BytesIO()
+    Image.new('RGB', (100, 100), color).save(buffer, 'GIF')
+    return ContentFile(buffer.getvalue())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT,
+                   THUMBNAIL_KVSTORE_PATH=':memory:')
+class MediaCollectTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Post_writer')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        default.kvstore.clear()
+
+    def create_post(self, color):
+        post = Post(author=self.user, text=color)
+        post.image.save(f'{color}.gif', gif(color))
+        return Post.objects.get(pk=post.pk)
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(TEMP_MEDIA_ROOT, name))
+
+    def collect(self, *args):
+        out = io.StringIO()
+        call_command('collect_media', *args, stdout=out)
+        return out.getvalue()
+
+    def age(self, name, seconds=2 * 60 * 60):
+        path = os.path.join(TEMP_MEDIA_ROOT, name)
+        past = time.time() - seconds
+        os.utime(path, (past, past))
+
+    def test_shared_image_deleted_with_last_post(self):
+        '''Общая картинка и ее миниатюра удаляются вместе с последним постом'''
+        first = self.create_post('white')
+        second = self.create_post('white')
+        name = first.image.name
+        thumbnail = get_thumbnail(first.image, '50x50').name
+        first.delete()
+        self.collect()
+        self.assertTrue(self.exists(name))
+        self.assertTrue(self.exists(thumbnail))
+        second.delete()
+        self.age(name)
+        self.assertIn('удалено файлов: 2', self.collect())
+        self.assertFalse(self.exists(name))
+        self.assertFalse(self.exists(thumbnail))
+        self.assertFalse(StaleImage.objects.exists())
+
+    def test_replaced_image_queued(self):
+        '''Замена картинки ставит старый файл в очередь'''
+        post = self.create_post('white')
+        old_name = post.image.name
+        post.image.save('black.gif', gif('black'))
+        self.assertTrue(StaleImage.objects.filter(name=old_name).exists())
+        self.age(old_name)
+        self.collect()
+        self.assertFalse(self.exists(old_name))
+        self.assertTrue(self.exists(post.image.name))
+
+    def test_dry_run_keeps_files(self):
+        '''Пробный запуск ничего не удаляет и не снимает очередь'''
+        post = self.create_post('white')
+        name = post.image.name
+        post.delete()
+        self.age(name)
+        self.assertIn('удалено файлов: 1', self.collect('--dry-run'))
+        self.assertTrue(self.exists(name))
+        self.assertTrue(StaleImage.objects.filter(name=name).exists())
+
+    def test_fresh_queued_image_kept(self):
+        '''Свежий файл из очереди ждет следующего запуска'''
+        post = self.create_post('white')
+        name = post.image.name
+        post.delete()
+        self.age(name)
+        # та же картинка загружена снова, а пост еще не сохранен
+        Post._meta.get_field('image').storage.save(
+            'posts/again.gif', gif('white'))
+        self.assertIn('удалено файлов: 0', self.collect())
+        self.assertTrue(self.exists(name))
+        self.assertTrue(StaleImage.objects.filter(name=name).exists())
+
+    def test_full_pass(self):
+        '''Полный проход удаляет старые сироты и оставляет свежие файлы'''
+        kept = self.create_post('white')
+        storage = Post._meta.get_field('image').storage
+        orphan = storage.save('posts/old.gif', gif('black'))
+        fresh = storage.save('posts/fresh.gif', gif('red'))
+        stale_thumbnail = storage.save('cache/ab/cd/stale.jpg', gif('blue'))
+        thumbnail = get_thumbnail(kept.image, '50x50').name
+        for name in (kept.image.name, orphan, stale_thumbnail, thumbnail):
+            self.age(name)
+        self.collect('--full')
+        self.assertFalse(self.exists(orphan))
+        self.assertFalse(self.exists(stale_thumbnail))
+        self.assertTrue(self.exists(fresh))
+        self.assertTrue(self.exists(kept.image.name))
+        self.assertTrue(self.exists(thumbnail))
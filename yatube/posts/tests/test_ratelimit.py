@@ -0,0 +1,73 @@
+from unittest import mock
+
+from core import ratelimit
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post
+
+User = get_user_model()
+
+
+class RateLimitTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Post_writer')
+        cls.author = User.objects.create_user(username='Author')
+        cls.authorised_client = Client()
+        cls.authorised_client.force_login(cls.user)
+
+    def setUp(self):
+        caches['core'].clear()
+
+    def test_sliding_window(self):
+        '''Предыдущее окно учитывается с весом оставшейся доли'''
+        hits = [ratelimit.hit('test', 'a', '2/m', now=60) for _ in range(3)]
+        self.assertEqual(hits[:2], [0, 0])
+        self.assertEqual(hits[2], 60)
+        # середина следующего окна: два запроса прошлого весят один
+        self.assertEqual(ratelimit.hit('test', 'a', '2/m', now=150), 0)
+        self.assertEqual(ratelimit.hit('test', 'a', '2/m', now=150), 30)
+
+    @override_settings(RATELIMITS={'post': {'user': '2/m'}})
+    def test_post_create_throttled(self):
+        '''Лишние посты получают 429 с Retry-After'''
+        address = reverse('posts:post_create')
+        responses = [
+            self.authorised_client.post(address, {'text': 'Пост'})
+            for _ in range(3)
+        ]
+        self.assertEqual(responses[1].status_code, 302)
+        self.assertEqual(responses[2].status_code, 429)
+        self.assertGreater(int(responses[2]['Retry-After']), 0)
+        self.assertEqual(Post.objects.count(), 2)
+        # форма по GET не ограничивается
+        self.assertEqual(self.authorised_client.get(address).status_code, 200)
+
+    @override_settings(RATELIMITS={'follow': {'ip': '1/m'}})
+    def test_follow_limited_by_ip(self):
+        '''Лимит по IP общий для всех пользователей адреса'''
+        address = reverse('posts:profile_follow', args=[self.author.username])
+        self.assertEqual(self.authorised_client.get(address).status_code, 302)
+        other = Client()
+        other.force_login(self.author)
+        address = reverse('posts:profile_follow', args=[self.user.username])
+        self.assertEqual(other.get(address).status_code, 429)
+
+    @override_settings(RATELIMITS={'follow': {'user': '2/m', 'ip': '1/m'}})
+    @mock.patch('core.ratelimit.time.time', return_value=90)
+    def test_rejected_request_keeps_user_limit(self, _):
+        '''Запрос, отклоненный по IP, не расходует лимит пользователя'''
+        address = reverse('posts:profile_follow', args=[self.author.username])
+        self.assertEqual(self.authorised_client.get(address).status_code, 302)
+        for _ in range(3):
+            self.assertEqual(
+                self.authorised_client.get(address).status_code, 429)
+        # с другого адреса пользователю остается один запрос из двух
+        self.assertEqual(self.authorised_client.get(
+            address, REMOTE_ADDR='10.0.0.1').status_code, 302)
+        self.assertEqual(self.authorised_client.get(
+            address, REMOTE_ADDR='10.0.0.2').status_code, 429)
@@ -0,0 +1,128 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from .. import follows, recommendations
+from ..models import (Comment, Group, Post, Recommendation,
+                      StaleRecommendation)
+
+User = get_user_model()
+
+
+def recommended(user):
+    return list(
+        Recommendation.objects.filter(user=user)
+        .values_list('author__username', flat=True)
+    )
+
+
+class RecommendationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.friend = User.objects.create_user(username='Friend')
+        cls.author = User.objects.create_user(username='Author')
+        cls.group_author = User.objects.create_user(username='Group_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def recommended(self, user):
+        return recommended(user)
+
+    def test_second_degree_follow_recommended(self):
+        '''Рекомендуются авторы, на которых подписаны мои подписки'''
+        follows.follow(self.reader, self.friend)
+        follows.follow(self.friend, self.author)
+        call_command('recommend_follows', stdout=StringIO())
+        self.assertEqual(self.recommended(self.reader), ['Author'])
+        self.assertFalse(StaleRecommendation.objects.exists())
+
+    def test_group_activity_recommended(self):
+        '''Рекомендуются авторы групп, в которых пишет пользователь'''
+        Post.objects.create(author=self.reader, text='Пост', group=self.group)
+        Post.objects.create(
+            author=self.group_author, text='Пост', group=self.group)
+        recommendations.refresh(full=True)
+        self.assertEqual(self.recommended(self.reader), ['Group_author'])
+
+    def test_incremental_refresh_only_affected_users(self):
+        '''Без изменений подписок повторный расчет ничего не делает'''
+        follows.follow(self.reader, self.friend)
+        follows.follow(self.friend, self.author)
+        self.assertEqual(recommendations.refresh(), 2)
+        self.assertEqual(recommendations.refresh(), 0)
+        # подписчик изменившегося пользователя тоже пересчитывается
+        follows.unfollow(self.friend, self.author)
+        self.assertEqual(recommendations.refresh(), 2)
+        self.assertEqual(self.recommended(self.reader), [])
+
+    def test_recommendations_on_follow_index(self):
+        '''Рекомендации выводятся на странице избранных авторов'''
+        follows.follow(self.reader, self.friend)
+        follows.follow(self.friend, self.author)
+        recommendations.refresh()
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [rec.author for rec in response.context['recommendations']],
+            [self.author],
+        )
+
+
+class GroupActivityTest(TransactionTestCase):
+    '''Отметки групп ставятся после фиксации транзакции.'''
+
+    def setUp(self):
+        self.reader = User.objects.create_user(username='Reader')
+        self.friend = User.objects.create_user(username='Friend')
+        self.group_author = User.objects.create_user(username='Group_author')
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def recommended(self, user):
+        return recommended(user)
+
+    def test_group_activity_marks_stale(self):
+        '''Посты и комментарии в группе пересчитываются без полного прохода'''
+        post = Post.objects.create(
+            author=self.reader, text='Пост', group=self.group)
+        recommendations.refresh(full=True)
+        self.assertEqual(self.recommended(self.reader), [])
+        # новый автор группы попадает в рекомендации ее участников
+        Post.objects.create(
+            author=self.group_author, text='Пост', group=self.group)
+        self.assertEqual(recommendations.refresh(), 2)
+        self.assertEqual(self.recommended(self.reader), ['Group_author'])
+        # комментатор получает авторов группы
+        Comment.objects.create(post=post, author=self.friend, text='Ответ')
+        self.assertEqual(recommendations.refresh(), 1)
+        self.assertEqual(
+            sorted(self.recommended(self.friend)), ['Group_author', 'Reader'])
+        # автор ушел из группы: у остальных он пропадает
+        Post.objects.filter(author=self.group_author).get().delete()
+        recommendations.refresh()
+        self.assertEqual(self.recommended(self.reader), [])
+
+    def test_delete_user_with_group_post(self):
+        '''Удаление автора поста в группе не оставляет его отметок'''
+        Post.objects.create(author=self.reader, text='Пост', group=self.group)
+        Post.objects.create(
+            author=self.group_author, text='Пост', group=self.group)
+        recommendations.refresh(full=True)
+        self.group_author.delete()
+        self.assertFalse(User.objects.filter(username='Group_author').exists())
+        self.assertEqual(
+            list(StaleRecommendation.objects.values_list(
+                'user__username', flat=True)),
+            ['Reader'])
@@ -0,0 +1,113 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import revisions
+from ..models import Post, PostRevision
+
+User = get_user_model()
+
+
+class RevisionDiffTest(TestCase):
+    def test_patch_restores_old_text(self):
+        '''Разница превращает новую версию в старую'''
+        pairs = (
+            ('', ''),
+            ('Новый текст', ''),
+            ('', 'Старый текст'),
+            ('Мы ехали, ехали.\nПриехали!', 'Мы шли,  шли.\nПришли!'),
+            ('a b c d e f', 'a b X d e f g'),
+        )
+        for new, old in pairs:
+            with self.subTest(new=new, old=old):
+                data = revisions.diff(new, old)
+                self.assertEqual(revisions.patch(new, data), old)
+
+    def test_small_edit_is_compact(self):
+        '''Правка одного слова хранит слово, а не весь текст'''
+        old = ' '.join(['слово'] * 200)
+        new = old.replace('слово', 'буква', 1)
+        snapshot, data = revisions.encode(0, new, old)
+        self.assertFalse(snapshot)
+        self.assertLess(len(data), 50)
+
+
+class PostRevisionTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Post_writer')
+        cls.authorised_client = Client()
+        cls.authorised_client.force_login(cls.user)
+
+    def setUp(self):
+        self.post = Post.objects.create(author=self.user, text='Версия 0')
+
+    def edit(self, text):
+        self.authorised_client.post(
+            reverse('posts:post_edit', args=[self.post.pk]), {'text': text})
+
+    def test_edit_adds_one_insert(self):
+        '''Правка добавляет одну вставку и не читает историю'''
+        with CaptureQueriesContext(connection) as queries:
+            self.edit('Версия 1')
+        revision_queries = [
+            query['sql'] for query in queries.captured_queries
+            if 'posts_postrevision' in query['sql']
+        ]
+        self.assertEqual(len(revision_queries), 1)
+        self.assertTrue(revision_queries[0].startswith('INSERT'))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.revision, 1)
+
+    def test_concurrent_edits_numbered_in_order(self):
+        '''Правки из двух загруженных копий поста не теряют версию'''
+        first = Post.objects.get(pk=self.post.pk)
+        second = Post.objects.get(pk=self.post.pk)
+        first.text = 'Версия 1'
+        first.save()
+        second.text = 'Версия 2'
+        second.save()
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.revision, 2)
+        for number, text in enumerate(('Версия 0', 'Версия 1', 'Версия 2')):
+            with self.subTest(number=number):
+                self.assertEqual(revisions.text_at(post, number), text)
+
+    def test_unchanged_text_adds_no_revision(self):
+        '''Сохранение без правки текста не создает версию'''
+        self.edit('Версия 0')
+        self.assertFalse(PostRevision.objects.exists())
+
+    def test_every_version_restored_with_one_query(self):
+        '''Любая версия собирается одним запросом'''
+        texts = ['Версия 0'] + [
+            f'Версия {i}: ' + ' '.join(['текст'] * i) for i in range(1, 25)
+        ]
+        for text in texts[1:]:
+            self.edit(text)
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.revision, 24)
+        snapshots = PostRevision.objects.filter(
+            snapshot=True).values_list('number', flat=True)
+        self.assertTrue({9, 19} <= set(snapshots))
+        for number, text in enumerate(texts):
+            with self.subTest(number=number):
+                with self.assertNumQueries(1 if number < 24 else 0):
+                    self.assertEqual(revisions.text_at(post, number), text)
+
+    def test_history_page(self):
+        '''Страница истории показывает версию и список версий'''
+        self.edit('Версия 1')
+        address = reverse('posts:post_history', args=[self.post.pk])
+        response = self.authorised_client.get(address, {'version': 0})
+        self.assertContains(response, 'Версия 0')
+        self.assertEqual(
+            [number for number, _ in response.context['versions']], [1, 0])
+        for version in ('2', '-1', 'x'):
+            with self.subTest(version=version):
+                response = self.authorised_client.get(
+                    address, {'version': version})
+                self.assertEqual(response.status_code, 404)
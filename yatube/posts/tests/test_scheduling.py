@@ -0,0 +1,129 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import scheduling
+from ..models import Group, Post, ScheduledPost
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ScheduledPostTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Post_writer')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.authorised_client = Client()
+        cls.authorised_client.force_login(cls.user)
+
+    def setUp(self):
+        caches['posts'].clear()
+
+    def schedule(self, text, minutes):
+        return ScheduledPost.objects.create(
+            author=self.user, group=self.group, text=text,
+            publish_at=timezone.now() + timedelta(minutes=minutes))
+
+    def test_create_scheduled_post(self):
+        '''Пост со временем в будущем откладывается, а не публикуется'''
+        publish_at = timezone.localtime() + timedelta(days=1)
+        response = self.authorised_client.post(
+            reverse('posts:post_create'), {
+                'text': 'Завтрашний пост',
+                'group': self.group.pk,
+                'publish_at': publish_at.strftime('%Y-%m-%dT%H:%M'),
+            })
+        self.assertRedirects(response, reverse('posts:scheduled'))
+        self.assertFalse(Post.objects.exists())
+        scheduled = ScheduledPost.objects.get()
+        self.assertEqual(scheduled.text, 'Завтрашний пост')
+        self.assertEqual(scheduled.group, self.group)
+        response = self.authorised_client.get(reverse('posts:scheduled'))
+        self.assertContains(response, 'Завтрашний пост')
+
+    def test_image_kept_until_published(self):
+        '''Картинка отложенного поста переходит в опубликованный пост'''
+        publish_at = timezone.localtime() + timedelta(minutes=1)
+        self.authorised_client.post(
+            reverse('posts:post_create'), {
+                'text': 'Пост с картинкой',
+                'image': SimpleUploadedFile(
+                    'small.gif', SMALL_GIF, content_type='image/gif'),
+                'publish_at': publish_at.strftime('%Y-%m-%dT%H:%M'),
+            })
+        scheduled = ScheduledPost.objects.get()
+        self.assertTrue(scheduled.image.storage.exists(scheduled.image.name))
+        scheduling.publish_due(now=publish_at + timedelta(minutes=1))
+        post = Post.objects.get()
+        self.assertEqual(post.image.name, scheduled.image.name)
+        self.assertEqual(
+            (post.image_width, post.image_height), (2, 1))
+
+    def test_past_time_rejected(self):
+        '''Время в прошлом не принимается'''
+        publish_at = timezone.localtime() - timedelta(hours=1)
+        self.authorised_client.post(
+            reverse('posts:post_create'), {
+                'text': 'Вчерашний пост',
+                'publish_at': publish_at.strftime('%Y-%m-%dT%H:%M'),
+            })
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(ScheduledPost.objects.exists())
+
+    def test_publish_due_in_batches(self):
+        '''Созревшие посты публикуются пачками, кэши сбрасываются на пачку'''
+        for i in range(5):
+            self.schedule(f'Пост {i}', -i - 1)
+        self.schedule('Будущий пост', 60)
+        with mock.patch.object(scheduling.feeds, 'invalidate') as feeds, \
+                mock.patch.object(scheduling.group_stats,
+                                  'invalidate') as stats:
+            self.assertEqual(scheduling.publish_due(batch_size=2), 5)
+        self.assertEqual(feeds.call_count, 3)
+        self.assertEqual(stats.call_count, 3)
+        self.assertIn(f'group:{self.group.pk}', feeds.call_args[0])
+        self.assertEqual(Post.objects.filter(group=self.group).count(), 5)
+        self.assertEqual(
+            list(ScheduledPost.objects.values_list('text', flat=True)),
+            ['Будущий пост'])
+        self.assertEqual(scheduling.publish_due(), 0)
+
+    def test_cancel(self):
+        '''Автор отменяет свой отложенный пост, чужой - нет'''
+        scheduled = self.schedule('Пост', 60)
+        address = reverse('posts:scheduled_cancel', args=[scheduled.pk])
+        other = Client()
+        other.force_login(User.objects.create_user(username='Other'))
+        self.assertEqual(other.post(address).status_code, 404)
+        self.authorised_client.post(address)
+        self.assertFalse(ScheduledPost.objects.exists())
@@ -0,0 +1,124 @@
+import json
+import os
+import runpy
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.db import connections
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import get_resolver
+from sorl.thumbnail import default
+
+from core import startup
+
+from ..models import Post
+
+User = get_user_model()
+
+IMPORTED = '''
+import json, sys
+import yatube.wsgi
+print(json.dumps(sorted(sys.modules)))
+'''
+
+
+class StartupTest(SimpleTestCase):
+    def test_wsgi_does_not_import_heavy_modules(self):
+        '''wsgi.py не импортирует Pillow и движок миниатюр.'''
+        env = dict(os.environ, STARTUP_PRELOAD='1')
+        completed = subprocess.run(
+            [sys.executable, '-c', IMPORTED], cwd=settings.BASE_DIR,
+            env=env, capture_output=True, text=True, check=True,
+        )
+        modules = set(json.loads(completed.stdout.splitlines()[-1]))
+        for module in ('PIL', 'sorl.thumbnail.engines.pil_engine'):
+            with self.subTest(module=module):
+                self.assertNotIn(module, modules)
+        self.assertIn('core.templatetags.user_filters', modules)
+
+    def test_gunicorn_uses_shared_cache(self):
+        '''Воркеры gunicorn по умолчанию делят один кэш.'''
+        with mock.patch.dict(os.environ):
+            os.environ.pop('CACHE_PROFILE', None)
+            config = runpy.run_path(
+                os.path.join(settings.BASE_DIR, 'gunicorn.conf.py'))
+            self.assertEqual(os.environ['CACHE_PROFILE'], 'shared')
+        self.assertGreater(config['workers'], 1)
+
+    def test_preload_compiles_project_templates(self):
+        '''preload строит резолвер и компилирует все шаблоны проекта.'''
+        templates = sum(
+            name.endswith('.html')
+            for _, _, files in os.walk(settings.TEMPLATES_DIR)
+            for name in files
+        )
+        self.assertEqual(startup.preload(), templates)
+        self.assertTrue(get_resolver()._populated)
+
+
+class WarmUpTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Post_writer')
+        Post.objects.create(author=cls.user, text='Пост до первого запроса')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_warm_up_renders_index_and_closes_connections(self):
+        '''warm_up кэширует главную и закрывает соединения перед fork.'''
+        with mock.patch.object(connections, 'close_all') as close_all:
+            startup.warm_up(render_index=True)
+        close_all.assert_called_once()
+        key = make_template_fragment_key('index_page', [1])
+        self.assertIsNotNone(cache.get(key))
+
+    def test_warm_up_closes_sqlite_handles(self):
+        '''Соединения кэша SQLite и хранилища миниатюр не переживают fork.'''
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        shared = {
+            alias: {
+                'BACKEND': 'core.sqlite_cache.SQLiteCache',
+                'LOCATION': os.path.join(root, f'{alias}.sqlite3'),
+            }
+            for alias in settings.CACHES
+        }
+        with override_settings(CACHES=shared), \
+                mock.patch.object(connections, 'close_all'):
+            caches['default'].connection
+            default.kvstore.connection
+            startup.warm_up(render_index=True)
+            self.assertIsNone(getattr(caches['default'].local,
+                                      'connection', None))
+        self.assertEqual(
+            getattr(default.kvstore.local, 'connections', {}), {})
+
+    def test_warm_up_fails_on_broken_index(self):
+        '''Ошибка главной при прогреве не проходит молча.'''
+        with mock.patch.object(startup, 'render', return_value=500), \
+                mock.patch.object(connections, 'close_all') as close_all:
+            with self.assertRaises(RuntimeError):
+                startup.warm_up(render_index=True)
+        close_all.assert_called_once()
+
+    def test_compile_urls_covers_app_namespaces(self):
+        '''Компилируются маршруты posts, users и about, но не админки.'''
+        resolvers = {
+            pattern.namespace: pattern
+            for pattern in get_resolver().url_patterns
+            if hasattr(pattern, 'namespace')
+        }
+        expected = sum(
+            1 + len(resolvers[name].url_patterns)
+            for name in startup.WARM_NAMESPACES
+        )
+        self.assertEqual(startup.compile_urls(), expected)
@@ -0,0 +1,94 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import SimpleTestCase, override_settings
+
+from core.middleware import IMMUTABLE, accepted_encodings
+
+STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(STATIC_ROOT=STATIC_ROOT, STATIC_SERVE=True)
+class StaticPipelineTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(STATIC_ROOT, 'staticfiles.json')) as manifest:
+            cls.paths = json.load(manifest)['paths']
+        cls.css = cls.paths['css/bootstrap.min.css']
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        '''collectstatic кладет файл с хэшем и его сжатую копию.'''
+        self.assertNotEqual(self.css, 'css/bootstrap.min.css')
+        with open(os.path.join(STATIC_ROOT, self.css), 'rb') as original:
+            data = original.read()
+        with gzip.open(os.path.join(STATIC_ROOT, self.css + '.gz')) as gz:
+            self.assertEqual(gz.read(), data)
+        # картинки не сжимаются повторно
+        logo = self.paths['img/logo.png']
+        self.assertFalse(
+            os.path.exists(os.path.join(STATIC_ROOT, logo + '.gz')))
+
+    def test_static_tag_uses_hashed_name(self):
+        '''{% static %} выдает имя с хэшем из манифеста.'''
+        rendered = Template(
+            "{% load static %}{% static 'css/bootstrap.min.css' %}"
+        ).render(Context())
+        self.assertEqual(rendered, settings.STATIC_URL + self.css)
+
+    def test_compressed_variant_by_accept_encoding(self):
+        '''Сжатая копия отдается только принимающему gzip клиенту.'''
+        url = settings.STATIC_URL + self.css
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Cache-Control'], IMMUTABLE)
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        body = b''.join(response.streaming_content)
+        self.assertEqual(len(body), int(response['Content-Length']))
+        self.assertTrue(gzip.decompress(body).startswith(b'@charset'))
+
+        for accept in ('', 'gzip;q=0, identity'):
+            with self.subTest(accept=accept):
+                response = self.client.get(url, HTTP_ACCEPT_ENCODING=accept)
+                self.assertFalse(response.has_header('Content-Encoding'))
+                self.assertTrue(b''.join(
+                    response.streaming_content).startswith(b'@charset'))
+
+    def test_cache_headers(self):
+        '''Без хэша в имени файл кэшируется ненадолго; есть 304.'''
+        response = self.client.get(
+            settings.STATIC_URL + 'css/bootstrap.min.css')
+        self.assertEqual(
+            response['Cache-Control'],
+            f'public, max-age={settings.STATIC_MAX_AGE}')
+        url = settings.STATIC_URL + self.css
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=self.client.get(url)['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['Cache-Control'], IMMUTABLE)
+
+    def test_missing_and_outside_files_not_served(self):
+        '''Чужие и несуществующие пути уходят дальше, к разбору URL.'''
+        for path in ('css/missing.css', '../manage.py',
+                     self.css + '.gz'):
+            with self.subTest(path=path):
+                response = self.client.get(settings.STATIC_URL + path)
+                self.assertEqual(response.status_code, 404)
+
+    def test_accepted_encodings(self):
+        self.assertEqual(
+            accepted_encodings('gzip, deflate;q=0.5, br;q=0'),
+            {'gzip', 'deflate'})
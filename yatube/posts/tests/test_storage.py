@@ -0,0 +1,87 @@
+import io
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..models import ArchivedPost, Post, ScheduledPost
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Post_writer')
+        cls.storage = Post._meta.get_field('image').storage
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def stored_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), TEMP_MEDIA_ROOT)
+            for root, _, names in os.walk(TEMP_MEDIA_ROOT)
+            for name in names
+        )
+
+    def test_identical_uploads_stored_once(self):
+        '''Одинаковые файлы хранятся один раз под одним именем'''
+        first = Post(author=self.user, text='Первый')
+        first.image.save('one.JPG', ContentFile(b'same bytes'))
+        second = Post(author=self.user, text='Второй')
+        second.image.save('two.jpg', ContentFile(b'same bytes'))
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(first.image.name.endswith('.jpg'))
+        self.assertEqual(len(self.stored_files()), 1)
+
+    def test_identical_upload_refreshes_mtime(self):
+        '''Повторная загрузка обновляет время изменения файла'''
+        name = self.storage.save('one.gif', ContentFile(b'same bytes'))
+        path = self.storage.path(name)
+        os.utime(path, (0, 0))
+        self.storage.save('two.gif', ContentFile(b'same bytes'))
+        self.assertGreater(os.path.getmtime(path), 0)
+
+    def test_dedupe_media_command(self):
+        '''Команда переносит старые файлы и удаляет дубликаты'''
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'posts'), exist_ok=True)
+        for name, content in (('a.gif', b'dup'), ('b.gif', b'dup'),
+                              ('c.gif', b'unique')):
+            with open(os.path.join(TEMP_MEDIA_ROOT, 'posts', name),
+                      'wb') as file:
+                file.write(content)
+            Post.objects.create(
+                author=self.user, text=name, image=f'posts/{name}')
+        now = timezone.now()
+        ArchivedPost.objects.create(
+            id=1000, author=self.user, text='a', pub_date=now,
+            image='posts/a.gif')
+        ScheduledPost.objects.create(
+            author=self.user, text='b', publish_at=now, image='posts/b.gif')
+        out = io.StringIO()
+        call_command('dedupe_media', stdout=out)
+        self.assertIn('освобождено 3 байт', out.getvalue())
+        names = set()
+        for model in (Post, ArchivedPost, ScheduledPost):
+            names.update(model.objects.values_list('image', flat=True))
+        self.assertEqual(len(names), 2)
+        self.assertEqual(sorted(names), self.stored_files())
+        # повторный запуск ничего не переносит
+        call_command('dedupe_media', stdout=io.StringIO())
+        self.assertEqual(sorted(names), self.stored_files())
@@ -0,0 +1,78 @@
+import io
+import os
+import shutil
+import tempfile
+
+from core.thumbnail_kvstore import KVStore
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def gif(color):
+    buffer = io.BytesIO()
+    Image.new('RGB', (100, 100), color).save(buffer, 'GIF')
+    return ContentFile(buffer.getvalue())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT,
+                   THUMBNAIL_KVSTORE_PATH=':memory:')
+class ThumbnailKVStoreTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Post_writer')
+        cls.guest_client = Client()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        default.kvstore.clear()
+
+    def selects(self, address):
+        '''SELECT-запросы к хранилищу миниатюр при открытии страницы.'''
+        statements = []
+        connection = default.kvstore.connection
+        connection.set_trace_callback(statements.append)
+        try:
+            self.guest_client.get(address)
+        finally:
+            connection.set_trace_callback(None)
+        return [sql for sql in statements if sql.startswith('SELECT')]
+
+    def test_page_thumbnails_resolved_in_one_query(self):
+        '''Миниатюры страницы читаются одним запросом, затем из памяти'''
+        for color in ('white', 'black', 'red'):
+            post = Post(author=self.user, text=color)
+            post.image.save(f'{color}.gif', gif(color))
+        address = reverse('posts:profile', args=[self.user.username])
+        self.guest_client.get(address)
+        default.kvstore.memo.clear()
+        self.assertEqual(len(self.selects(address)), 1)
+        self.assertEqual(self.selects(address), [])
+
+    def test_store_survives_restart(self):
+        '''Записи хранятся в файле и видны новому экземпляру хранилища'''
+        path = os.path.join(TEMP_MEDIA_ROOT, 'thumbnails.sqlite3')
+        post = Post(author=self.user, text='Пост')
+        post.image.save('white.gif', gif('white'))
+        with self.settings(THUMBNAIL_KVSTORE_PATH=path):
+            default.kvstore.clear()
+            thumbnail = get_thumbnail(post.image, '50x50')
+            restarted = KVStore()
+            cached = restarted.get(ImageFile(thumbnail.name, default.storage))
+        self.assertEqual(cached.name, thumbnail.name)
@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import moderation, trending
+from ..models import Comment, Group, GroupScore, Post, PostScore
+
+User = get_user_model()
+
+
+class TrendingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Post_writer')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.quiet_post = Post.objects.create(author=cls.user, text='Тихий')
+        cls.hot_post = Post.objects.create(
+            author=cls.user, text='Обсуждаемый', group=cls.group)
+        for _ in range(3):
+            Comment.objects.create(
+                post=cls.hot_post, author=cls.user, text='Комментарий')
+
+    def setUp(self):
+        caches['posts'].clear()
+
+    def test_decay_halves_score(self):
+        '''За период полураспада рейтинг уменьшается вдвое'''
+        now = timezone.now()
+        self.assertAlmostEqual(
+            trending.decay(4.0, now - trending.HALF_LIFE, now), 2.0)
+
+    def test_events_update_scores_incrementally(self):
+        '''Публикация и комментарии увеличивают рейтинг поста'''
+        score = PostScore.objects.get(pk=self.hot_post.pk).score
+        self.assertAlmostEqual(score, 4.0, places=3)
+
+    def test_moved_post_takes_score_to_new_group(self):
+        '''Рейтинг поста переходит вместе с ним в другую группу'''
+        other = Group.objects.create(
+            title='Другая группа', slug='other-slug', description='Описание')
+        post = Post.objects.get(pk=self.hot_post.pk)
+        post.group = other
+        post.save()
+        scores = dict(GroupScore.objects.values_list('group', 'score'))
+        self.assertAlmostEqual(scores[self.group.pk], 0.0, places=3)
+        self.assertAlmostEqual(scores[other.pk], 4.0, places=3)
+        caches['posts'].clear()
+        self.assertEqual(trending.group_ids()[0], other.pk)
+
+    def test_bulk_move_takes_scores_to_new_group(self):
+        '''Перенос из админки переносит рейтинги постов'''
+        other = Group.objects.create(
+            title='Другая группа', slug='other-slug', description='Описание')
+        moderation.move_to_group(Post.objects.all(), other)
+        scores = dict(GroupScore.objects.values_list('group', 'score'))
+        self.assertAlmostEqual(scores[self.group.pk], 0.0, places=3)
+        self.assertAlmostEqual(scores[other.pk], 5.0, places=3)
+
+    def test_recompute_matches_incremental_order(self):
+        '''Полный пересчет дает тот же порядок, что и события'''
+        incremental = trending.post_ids()
+        caches['posts'].clear()
+        trending.recompute(timezone.now() + timedelta(seconds=1))
+        self.assertEqual(trending.post_ids(), incremental)
+        self.assertEqual(
+            incremental, [self.hot_post.pk, self.quiet_post.pk])
+        self.assertEqual(trending.group_ids(), [self.group.pk])
+
+    def test_popular_page(self):
+        '''Страница популярного выводит посты по рейтингу'''
+        response = Client().get(reverse('posts:popular'))
+        self.assertTemplateUsed(response, 'posts/includes/post_list.html')
+        self.assertEqual(
+            [post.id for post in response.context['page_obj']],
+            [self.hot_post.pk, self.quiet_post.pk],
+        )
+        self.assertEqual(list(response.context['groups']), [self.group])
@@ -5,11 +5,15 @@ import tempfile
 from django import forms
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from PIL import Image
 
+from ..feed import FeedRow
 from ..models import Comment, Follow, Group, Post
 
 User = get_user_model()
@@ -70,7 +74,8 @@ class PostPagesTest(TestCase):
         page = Post.objects.select_related('author', 'group').all()[:10]
         response = self.authorised_client.get(reverse('posts:index'))
         self.assertEqual(
-            list(response.context.get('page_obj').object_list), list(page)
+            [post.id for post in response.context.get('page_obj')],
+            [post.id for post in page]
         )
 
     def test_page_show_correct_context_group(self):
@@ -79,8 +84,10 @@ class PostPagesTest(TestCase):
         page = Post.objects.filter(group=self.group).all()[:10]
         response = self.authorised_client.get(
             reverse('posts:group_list', kwargs={'slug': 'test-slug'}))
-        self.assertEqual(list(response.context.get(
-            'page_obj').object_list), list(page))
+        self.assertEqual(
+            [post.id for post in response.context.get('page_obj')],
+            [post.id for post in page]
+        )
 
     def test_page_show_correct_context_author(self):
         '''Шаблон profile сформирован
@@ -89,8 +96,10 @@ class PostPagesTest(TestCase):
         page = Post.objects.filter(author=self.user).all()[:10]
         response = self.authorised_client.get(
             reverse('posts:profile', kwargs={'username': 'Post_writer'}))
-        self.assertEqual(list(response.context.get(
-            'page_obj').object_list), list(page))
+        self.assertEqual(
+            [post.id for post in response.context.get('page_obj')],
+            [post.id for post in page]
+        )
 
     def test_post_page_show_correct_context_post_detail(self):
         '''Шаблон post_detail сформирован
@@ -211,7 +220,8 @@ class PaginatorViewsTest(TestCase):
             self.assertEqual(len(response.context['page_obj']), 3)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT,
+                   THUMBNAIL_KVSTORE_PATH=':memory:')
 class PostImageTest(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -266,18 +276,22 @@ class PostImageTest(TestCase):
             reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
             reverse('posts:profile', kwargs={'username': 'Post_writer'}),
         ]
+        # файл назван по хэшу содержимого
+        stored_image = Post.objects.get().image.name
+        self.assertRegex(
+            stored_image, r'^posts/[0-9a-f]{2}/[0-9a-f]{64}\.gif$')
         for address in addresses:
             response = self.authorised_client.get(address)
             post = response.context['page_obj'][0]
             image = post.image
-            self.assertEqual(image, 'posts/small.gif')
+            self.assertEqual(image, stored_image)
         # страницу поста
         response = self.authorised_client.get(
             reverse('posts:post_detail', kwargs={'post_id': 1})
         )
         post = response.context['post']
         image = post.image
-        self.assertEqual(image, 'posts/small.gif')
+        self.assertEqual(image, stored_image)
 
 
 class PostCommentTest(TestCase):
@@ -446,3 +460,50 @@ class FollowTest(TestCase):
         response2 = self.authorised_client2.get(reverse('posts:follow_index'))
         last_object_id2 = response2.context['page_obj'][0].id
         self.assertNotEqual(last_object_id2, FollowTest.post.id)
+
+
+class FeedQueryTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='Post_writer', first_name='Иван', last_name='Петров')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+        cls.guest_client = Client()
+
+    def test_feed_selects_only_needed_columns(self):
+        '''Лента не выбирает пароль автора и описание группы'''
+        caches['posts'].clear()
+        caches['default'].clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(reverse('posts:index'))
+        feed_sql = [
+            query['sql'] for query in queries.captured_queries
+            if 'posts_post' in query['sql']
+        ]
+        self.assertTrue(feed_sql)
+        for sql in feed_sql:
+            self.assertNotIn('password', sql)
+            self.assertNotIn('description', sql)
+        self.assertContains(response, 'Иван Петров')
+        self.assertContains(response, 'Тестовая группа')
+
+    def test_feed_rows(self):
+        '''Лента строится из FeedRow с данными автора и группы'''
+        Post.objects.create(author=self.user, text='Пост без группы')
+        rows = list(Post.objects.feed_rows())
+        self.assertIsInstance(rows[0], FeedRow)
+        self.assertIsNone(rows[0].group)
+        self.assertEqual(rows[1].id, self.post.id)
+        self.assertEqual(rows[1].author.get_full_name(), 'Иван Петров')
+        self.assertEqual(str(rows[1].author), 'Post_writer')
+        self.assertEqual(rows[1].group.slug, 'test-slug')
@@ -0,0 +1,143 @@
+'''Популярные посты и группы.
+
+Рейтинг - сумма весов событий (публикация поста, комментарий), каждый из
+которых затухает вдвое за HALF_LIFE. События обновляют PostScore и
+GroupScore инкрементально (см. signals.py), при переносе поста в другую
+группу его рейтинг переходит вместе с ним, а команда ``rank_trending``
+периодически пересчитывает рейтинги с нуля одним проходом по событиям
+окна. Отсортированные списки id хранятся в кэше, так что страница
+популярного читается срезом списка и одним запросом по первичному ключу.
+'''
+from collections import defaultdict
+from datetime import timedelta
+
+from core.cache import get_or_refresh, namespace, put
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Comment, Group, GroupScore, Post, PostScore
+
+HALF_LIFE = timedelta(hours=24)
+WINDOW = timedelta(days=7)
+POST_WEIGHT = 1.0
+COMMENT_WEIGHT = 1.0
+RANK_LIMIT = 1000
+RANK_TTL = 60
+POSTS_KEY = 'trending:posts'
+GROUPS_KEY = 'trending:groups'
+
+
+def decay(score, updated, now):
+    age = (now - updated) / HALF_LIFE
+    return score * 0.5 ** age
+
+
+def _bump(model, pk, weight, now):
+    with transaction.atomic():
+        row, created = model.objects.select_for_update().get_or_create(
+            pk=pk, defaults={'score': max(weight, 0.0), 'updated': now})
+        if not created:
+            row.score = max(decay(row.score, row.updated, now) + weight, 0.0)
+            row.updated = now
+            row.save(update_fields=('score', 'updated'))
+
+
+def record(post, weight, now=None):
+    '''Учитывает событие с весом weight для поста и его группы.'''
+    now = now or timezone.now()
+    _bump(PostScore, post.pk, weight, now)
+    if post.group_id:
+        _bump(GroupScore, post.group_id, weight, now)
+
+
+def move(posts, group_id, now=None):
+    '''Переносит рейтинг постов [(pk, прежняя группа)] в группу group_id.'''
+    now = now or timezone.now()
+    old_groups = dict(posts)
+    moved = defaultdict(float)
+    rows = PostScore.objects.filter(pk__in=old_groups).values_list(
+        'pk', 'score', 'updated')
+    for pk, score, updated in rows:
+        if old_groups[pk] != group_id:
+            moved[old_groups[pk]] += decay(score, updated, now)
+    for old_group_id, value in moved.items():
+        if old_group_id:
+            _bump(GroupScore, old_group_id, -value, now)
+    if group_id and moved:
+        _bump(GroupScore, group_id, sum(moved.values()), now)
+
+
+def _accumulate(rows, weight, now, posts, groups):
+    '''Добавляет затухшие к моменту now веса событий rows.'''
+    half_life = HALF_LIFE.total_seconds()
+    for post_id, group_id, created in rows:
+        value = weight * 0.5 ** ((now - created).total_seconds() / half_life)
+        posts[post_id] += value
+        if group_id:
+            groups[group_id] += value
+
+
+def _ranked(scores):
+    return sorted(scores, key=scores.get, reverse=True)[:RANK_LIMIT]
+
+
+def recompute(now=None):
+    '''Пересчитывает рейтинги с нуля по событиям за WINDOW.'''
+    now = now or timezone.now()
+    since = now - WINDOW
+    posts = defaultdict(float)
+    groups = defaultdict(float)
+    _accumulate(
+        Post.objects.filter(pub_date__gte=since).order_by()
+        .values_list('pk', 'group_id', 'pub_date').iterator(),
+        POST_WEIGHT, now, posts, groups)
+    _accumulate(
+        Comment.objects.filter(created__gte=since).order_by()
+        .values_list('post_id', 'post__group_id', 'created').iterator(),
+        COMMENT_WEIGHT, now, posts, groups)
+    with transaction.atomic():
+        PostScore.objects.all().delete()
+        GroupScore.objects.all().delete()
+        PostScore.objects.bulk_create(
+            PostScore(post_id=pk, score=score, updated=now)
+            for pk, score in posts.items())
+        GroupScore.objects.bulk_create(
+            GroupScore(group_id=pk, score=score, updated=now)
+            for pk, score in groups.items())
+    put(namespace('posts'), POSTS_KEY, _ranked(posts), RANK_TTL)
+    put(namespace('posts'), GROUPS_KEY, _ranked(groups), RANK_TTL)
+    return len(posts), len(groups)
+
+
+def _ranked_from_table(model):
+    now = timezone.now()
+    rows = model.objects.filter(updated__gte=now - WINDOW).values_list(
+        'pk', 'score', 'updated')
+    return _ranked({pk: decay(score, updated, now)
+                    for pk, score, updated in rows})
+
+
+def post_ids():
+    '''Id популярных постов по убыванию рейтинга.'''
+    return get_or_refresh(
+        namespace('posts'), POSTS_KEY,
+        lambda: _ranked_from_table(PostScore), RANK_TTL)
+
+
+def group_ids():
+    return get_or_refresh(
+        namespace('posts'), GROUPS_KEY,
+        lambda: _ranked_from_table(GroupScore), RANK_TTL)
+
+
+def _in_order(queryset, ids):
+    objects = queryset.in_bulk(ids)
+    return [objects[pk] for pk in ids if pk in objects]
+
+
+def resolve_posts(ids):
+    return _in_order(Post.objects.feed_rows(), ids)
+
+
+def top_groups(limit=5):
+    return _in_order(Group.objects.all(), group_ids()[:limit])
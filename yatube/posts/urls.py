@@ -5,11 +5,46 @@ from . import views
 app_name = 'posts'
 
 urlpatterns = [
+    path('popular/', views.popular, name='popular'),
+    path('feeds/<str:fmt>/', views.index_feed, name='index_feed'),
+    path('group/', views.group_index, name='group_index'),
+    path(
+        'group/<slug:slug>/feeds/<str:fmt>/',
+        views.group_feed,
+        name='group_feed'
+    ),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path(
+        'group/<slug:slug>/export/<str:fmt>/',
+        views.group_export,
+        name='group_export'
+    ),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/feeds/<str:fmt>/',
+        views.profile_feed,
+        name='profile_feed'
+    ),
+    path(
+        'profile/<str:username>/export/<str:fmt>/',
+        views.profile_export,
+        name='profile_export'
+    ),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
+    path('create/draft/', views.draft_autosave, name='draft_autosave'),
+    path('scheduled/', views.scheduled, name='scheduled'),
+    path(
+        'scheduled/<int:scheduled_id>/cancel/',
+        views.scheduled_cancel,
+        name='scheduled_cancel',
+    ),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path(
+        'posts/<int:post_id>/history/',
+        views.post_history,
+        name='post_history',
+    ),
     path('posts/<int:post_id>/comment', views.add_comment, name='add_comment'),
     path('follow/', views.follow_index, name='follow_index'),
     path(
@@ -22,5 +57,15 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow'
     ),
+    path(
+        'profile/<str:username>/followers/',
+        views.profile_followers,
+        name='profile_followers'
+    ),
+    path(
+        'profile/<str:username>/following/',
+        views.profile_following,
+        name='profile_following'
+    ),
     path('', views.index, name='index'),
 ]
@@ -1,9 +1,15 @@
+from core.ratelimit import ratelimit
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
 from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import require_POST
 
-from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from . import (archive, drafts, exports, feeds, follows, group_stats,
+               recommendations, revisions, scheduling, trending)
+from .forms import CommentForm, PostForm, ScheduleForm
+from .models import ArchivedPost, Group, Post, User
 
 PAGE_PER_LIST = 10
 
@@ -14,10 +20,21 @@ def paginator(request, post_list, page_per_list):
     return paginator.get_page(page_number)
 
 
+def export_response(request, post_list, name, fmt, title):
+    if fmt not in exports.EXPORTERS:
+        raise Http404
+    content_type, lines = exports.EXPORTERS[fmt]
+    rows = post_list.iterator(chunk_size=exports.EXPORT_CHUNK_SIZE)
+    response = StreamingHttpResponse(
+        lines(request, rows, title), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{name}.{fmt}"'
+    return response
+
+
 def index(request):
     template = 'posts/index.html'
     title = 'Последние обновления на сайте'
-    post_list = Post.objects.select_related('author', 'group').all()
+    post_list = archive.feed('index')
     page_obj = paginator(request, post_list, PAGE_PER_LIST)
     context = {
         'title': title,
@@ -26,10 +43,32 @@ def index(request):
     return render(request, template, context)
 
 
+def popular(request):
+    template = 'posts/popular.html'
+    title = 'Популярное'
+    page_obj = paginator(request, trending.post_ids(), PAGE_PER_LIST)
+    page_obj.object_list = trending.resolve_posts(page_obj.object_list)
+    context = {
+        'title': title,
+        'page_obj': page_obj,
+        'groups': trending.top_groups(),
+    }
+    return render(request, template, context)
+
+
+def group_index(request):
+    template = 'posts/group_index.html'
+    context = {
+        'title': 'Группы',
+        'groups': group_stats.directory(),
+    }
+    return render(request, template, context)
+
+
 def group_posts(request, slug):
     template = 'posts/group_list.html'
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related('author', 'group').all()
+    post_list = archive.feed(f'group:{group.pk}', group=group)
     page_obj = paginator(request, post_list, PAGE_PER_LIST)
     context = {
         'title': group.title,
@@ -45,18 +84,13 @@ def profile(request, username):
     self_follow = False
     title = f'Профайл пользователя {username}'
     author = get_object_or_404(User, username=username)
-    fio = author.get_full_name
-    post_author = author.posts.select_related('author', 'group').all()
+    fio = author.get_full_name()
+    post_author = archive.feed(f'author:{author.pk}', author=author)
     count = post_author.count()
     page_obj = paginator(request, post_author, PAGE_PER_LIST)
     if request.user.is_authenticated:
-        if request.user == author:
-            self_follow = True
-        if Follow.objects.filter(user=request.user).exists():
-            authors_follow = User.objects.filter(
-                following__user=request.user).all()
-            if author in authors_follow:
-                following = True
+        self_follow = request.user == author
+        following = follows.is_following(request.user, author)
     context = {
         'title': title,
         'author': author,
@@ -72,11 +106,18 @@ def profile(request, username):
 
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, id=post_id)
-    count = Post.objects.filter(author=post.author).count()
+    post = Post.objects.select_related('author', 'group').filter(
+        id=post_id).first()
+    # архивный пост показывается без формы комментария
+    form = CommentForm() if post else None
+    if post is None:
+        post = get_object_or_404(
+            ArchivedPost.objects.select_related('author', 'group'),
+            id=post_id)
+    count = archive.feed(
+        f'author:{post.author_id}', author_id=post.author_id).count()
     title = 'Детали поста'
-    form = CommentForm()
-    post_comments = post.comments.select_related('post', 'author').all()
+    post_comments = post.comments.select_related('author').all()
     context = {
         'post': post,
         'count': count,
@@ -87,27 +128,93 @@ def post_detail(request, post_id):
     return render(request, template, context)
 
 
+def post_history(request, post_id):
+    template = 'posts/post_history.html'
+    post = get_object_or_404(
+        Post.objects.select_related('author'), id=post_id)
+    try:
+        version = int(request.GET.get('version', post.revision))
+    except ValueError:
+        raise Http404
+    text = revisions.text_at(post, version)
+    if text is None:
+        raise Http404
+    context = {
+        'title': 'История правок',
+        'post': post,
+        'version': version,
+        'text': text,
+        'versions': revisions.versions(post),
+    }
+    return render(request, template, context)
+
+
 @login_required
+@ratelimit('post')
 def post_create(request):
     template = 'posts/create_post.html'
     title = 'Новый пост'
-    form = PostForm()
+    draft = drafts.load(request.user)
+    initial = {}
+    if draft:
+        initial = {'text': draft['text'], 'group': draft['group_id']}
+    form = PostForm(initial=initial)
     context = {
         'form': form,
+        'schedule_form': ScheduleForm(),
         'title': title,
         'is_edit': False
     }
     if request.method == 'POST':
         form = PostForm(request.POST, files=request.FILES or None)
-        if form.is_valid():
+        schedule_form = ScheduleForm(request.POST)
+        if form.is_valid() and schedule_form.is_valid():
             post = form.save(commit=False)
             post.author = request.user
+            publish_at = schedule_form.cleaned_data['publish_at']
+            drafts.discard(request.user)
+            if publish_at:
+                scheduling.schedule(post, publish_at)
+                return redirect('posts:scheduled')
             post.save()
             return redirect('posts:profile', request.user)
+        context['schedule_form'] = schedule_form
         return render(request, template, context)
     return render(request, template, context)
 
 
+@login_required
+def scheduled(request):
+    template = 'posts/scheduled.html'
+    context = {
+        'title': 'Отложенные посты',
+        'posts': request.user.scheduled_posts.select_related('group'),
+    }
+    return render(request, template, context)
+
+
+@require_POST
+@login_required
+def scheduled_cancel(request, scheduled_id):
+    scheduled = get_object_or_404(
+        request.user.scheduled_posts, id=scheduled_id)
+    scheduling.cancel(scheduled)
+    return redirect('posts:scheduled')
+
+
+@require_POST
+@login_required
+@ratelimit('draft')
+def draft_autosave(request):
+    try:
+        group_id = int(request.POST.get('group') or 0) or None
+    except ValueError:
+        group_id = None
+    draft = drafts.autosave(
+        request.user, request.POST.get('text', ''), group_id)
+    return JsonResponse({'updated': draft['updated'].isoformat()})
+
+
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post, id=post_id)
@@ -132,6 +239,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@ratelimit('comment')
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
@@ -146,31 +254,82 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     title = 'Избранные авторы'
-    post_list = Post.objects.select_related(
-        'author').filter(author__following__user=request.user)
+    post_list = archive.feed(None, author__following__user=request.user)
     page_obj = paginator(request, post_list, PAGE_PER_LIST)
     context = {
         'title': title,
-        'page_obj': page_obj
+        'page_obj': page_obj,
+        'recommendations': recommendations.for_user(request.user),
     }
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@ratelimit('follow', methods=('GET', 'POST'))
 def profile_follow(request, username):
-    author = User.objects.filter(username=username).get()
-    if not Follow.objects.filter(
-            user=request.user, author=author).exists(
-    ) and author != request.user:
-        Follow.objects.create(
-            user=request.user,
-            author=author
-        )
+    author = get_object_or_404(User, username=username)
+    follows.follow(request.user, author)
     return redirect('posts:profile', username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    author = User.objects.filter(username=username).get()
-    Follow.objects.filter(author=author).delete()
+    author = get_object_or_404(User, username=username)
+    follows.unfollow(request.user, author)
     return redirect('posts:profile', username=username)
+
+
+def profile_followers(request, username):
+    author = get_object_or_404(User, username=username)
+    context = {
+        'title': f'Подписчики {username}',
+        'author': author,
+        'page_obj': follows.followers(request, author),
+    }
+    return render(request, 'posts/follow_list.html', context)
+
+
+def profile_following(request, username):
+    author = get_object_or_404(User, username=username)
+    context = {
+        'title': f'Подписки {username}',
+        'author': author,
+        'page_obj': follows.following(request, author),
+    }
+    return render(request, 'posts/follow_list.html', context)
+
+
+@login_required
+def profile_export(request, username, fmt):
+    author = get_object_or_404(User, username=username)
+    if request.user != author and not request.user.is_staff:
+        raise PermissionDenied
+    return export_response(
+        request, archive.feed(f'author:{author.pk}', author=author),
+        username, fmt, f'Посты пользователя {username}')
+
+
+@login_required
+def group_export(request, slug, fmt):
+    if not request.user.is_staff:
+        raise PermissionDenied
+    group = get_object_or_404(Group, slug=slug)
+    return export_response(
+        request, archive.feed(f'group:{group.pk}', group=group),
+        slug, fmt, group.title)
+
+
+def index_feed(request, fmt):
+    return feeds.response(request, feeds.PostsFeed, 'index', fmt)
+
+
+def group_feed(request, slug, fmt):
+    group = get_object_or_404(Group, slug=slug)
+    return feeds.response(
+        request, feeds.GroupPostsFeed, f'group:{group.pk}', fmt, group)
+
+
+def profile_feed(request, username, fmt):
+    author = get_object_or_404(User, username=username)
+    return feeds.response(
+        request, feeds.AuthorPostsFeed, f'author:{author.pk}', fmt, author)
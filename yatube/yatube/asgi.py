@@ -0,0 +1,24 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Views are run in a thread pool of ``settings.ASGI_THREADS`` workers while
+request and response I/O is handled by the event loop, e.g.::
+
+    uvicorn yatube.asgi:application
+"""
+
+import os
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+from core import startup
+from core.asgi import AsgiHandler
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+application = AsgiHandler(get_wsgi_application())
+
+if settings.STARTUP_PRELOAD:
+    startup.warm_up(render_index=settings.STARTUP_RENDER_INDEX)
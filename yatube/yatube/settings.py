@@ -34,6 +34,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -64,6 +65,14 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# потоки, в которых ASGI-приложение выполняет синхронные представления
+ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 8))
+# STARTUP_PRELOAD=1: wsgi.py и asgi.py заранее строят URL и шаблоны,
+# чтобы воркеры получили их после fork готовыми (gunicorn --preload);
+# STARTUP_RENDER_INDEX=1 вдобавок кэширует первую страницу главной
+STARTUP_PRELOAD = os.environ.get('STARTUP_PRELOAD') == '1'
+STARTUP_RENDER_INDEX = os.environ.get('STARTUP_RENDER_INDEX') == '1'
+
 
 DATABASES = {
     'default': {
@@ -102,6 +111,12 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static/')
+# имена с хэшем содержимого и сжатые копии .gz/.br из collectstatic
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStorage'
+# STATIC_SERVE=1: статику из STATIC_ROOT отдает само приложение
+STATIC_SERVE = os.environ.get('STATIC_SERVE') == '1'
+# сколько секунд браузер кэширует статику без хэша в имени
+STATIC_MAX_AGE = 60 * 60
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -116,9 +131,58 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# загрузки крупнее 512 КиБ пишутся на диск по частям, а не в память
+FILE_UPLOAD_MAX_MEMORY_SIZE = 512 * 1024
+
+# метаданные миниатюр в общем для всех процессов файле
+THUMBNAIL_KVSTORE = 'core.thumbnail_kvstore.KVStore'
+THUMBNAIL_KVSTORE_PATH = os.environ.get(
+    'THUMBNAIL_KVSTORE_PATH', os.path.join(BASE_DIR, 'thumbnails.sqlite3'))
+
+# CACHE_PROFILE=shared включает кэш в файлах SQLite, общий для всех процессов
+# на машине; по умолчанию у каждого процесса свой кэш в памяти. Нескольким
+# воркерам нужен общий кэш - gunicorn.conf.py включает его сам.
+CACHE_PROFILE = os.environ.get('CACHE_PROFILE', 'local')
+CACHE_ROOT = os.environ.get('CACHE_ROOT', os.path.join(BASE_DIR, 'cache'))
+# версия пространства имен приложения: увеличение сбрасывает его ключи
+CACHE_VERSIONS = {
+    'posts': 1,
+    'users': 1,
+    'core': 1,
+}
+
+
+def cache_alias(namespace):
+    if CACHE_PROFILE == 'shared':
+        alias = {
+            'BACKEND': 'core.sqlite_cache.SQLiteCache',
+            'LOCATION': os.path.join(CACHE_ROOT, f'{namespace}.sqlite3'),
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    else:
+        alias = {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': namespace,
+        }
+    if namespace in CACHE_VERSIONS:
+        alias['KEY_PREFIX'] = namespace
+        alias['VERSION'] = CACHE_VERSIONS[namespace]
+    return alias
+
 
 CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    'default': cache_alias('default'),
+    **{namespace: cache_alias(namespace) for namespace in CACHE_VERSIONS},
+}
+
+# посты старше стольких дней команда archive_posts переносит в архив
+POSTS_ARCHIVE_AFTER_DAYS = int(
+    os.environ.get('POSTS_ARCHIVE_AFTER_DAYS', 365))
+
+# лимиты записей: «число/период» на пользователя и на IP
+RATELIMITS = {
+    'post': {'user': '10/m', 'ip': '60/m'},
+    'comment': {'user': '20/m', 'ip': '120/m'},
+    'follow': {'user': '30/m', 'ip': '120/m'},
+    'draft': {'user': '120/m'},
 }